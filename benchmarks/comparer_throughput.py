@@ -0,0 +1,174 @@
+"""
+Throughput and accuracy benchmark for office_comparer_batch.py
+
+Loads a synthetic corpus (see synthetic_corpus.py; generated into a
+temporary directory unless --corpus is given), scores every same-type pair
+like the C++ core asks for, and reports
+- loading: files/sec and MB/sec with a warm worker pool (no cache)
+- scoring: pairs/sec per file type
+- peak RSS of the benchmark process and of the largest loader process
+- precision/recall of the similar pairs against the corpus ground truth
+
+Usage:
+    python benchmarks/comparer_throughput.py [--corpus DIR] [--tfidf corpus] [--text-features text]
+                                             [--workers N] [--json results.json] [generator options]
+
+The JSON output is meant to be kept per commit to track changes over time.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import office_comparer_batch as comparer  # noqa: E402
+import synthetic_corpus  # noqa: E402
+
+
+def git_commit():
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def all_pairs(paths_by_type):
+    """Every same-type pair, in the pair-list format of the comparer"""
+    comparisons = []
+    for file_type, paths in paths_by_type.items():
+        for a in range(len(paths)):
+            for b in range(a + 1, len(paths)):
+                comparisons.append({"type": file_type, "file1": paths[a], "file2": paths[b]})
+    return comparisons
+
+
+def precision_recall(found, expected):
+    true_positives = len(found & expected)
+    return {
+        "true_positives": true_positives,
+        "false_positives": len(found - expected),
+        "false_negatives": len(expected - found),
+        "precision": round(true_positives / len(found), 4) if found else None,
+        "recall": round(true_positives / len(expected), 4) if expected else None,
+    }
+
+
+def run_benchmark(corpus_dir, manifest, tfidf_mode, options, use_prefilter):
+    stats = comparer.Stats()
+    paths_by_type = {}
+    for entry in manifest["files"]:
+        paths_by_type.setdefault(entry["type"], []).append(os.path.join(corpus_dir, entry["path"]))
+    files_to_read = {path: file_type for file_type, paths in paths_by_type.items() for path in paths}
+    corpus_bytes = sum(os.path.getsize(path) for path in files_to_read)
+
+    # Pool start-up and library imports are not part of the measured time
+    # (see startup_budget.py for those)
+    import sklearn.feature_extraction.text  # noqa: F401
+    with options.create_pool() as pool:
+        prefilter = comparer.Prefilter() if use_prefilter else None
+        start = time.perf_counter()
+        file_cache = comparer.load_files(files_to_read, None, pool, options, prefilter, stats)
+        load_seconds = time.perf_counter() - start
+
+    results = {
+        "load": {
+            "files": len(files_to_read),
+            "bytes": corpus_bytes,
+            "seconds": round(load_seconds, 3),
+            "files_per_sec": round(len(files_to_read) / load_seconds, 1),
+            "mb_per_sec": round(corpus_bytes / (1024 * 1024) / load_seconds, 2),
+        },
+        "score": {},
+    }
+
+    found = set()
+    relative = {path: os.path.relpath(path, corpus_dir) for path in files_to_read}
+    for file_type, paths in paths_by_type.items():
+        comparisons = all_pairs({file_type: paths})
+        rejected = prefilter.reject(comparisons) if prefilter is not None else set()
+        start = time.perf_counter()
+        scores = comparer.score_comparisons(comparisons, file_cache, tfidf_mode, rejected, stats)
+        seconds = time.perf_counter() - start
+
+        for i, comp in enumerate(comparisons):
+            if scores[str(i)]["similar"]:
+                found.add(tuple(sorted((relative[comp["file1"]], relative[comp["file2"]]))))
+        results["score"][file_type] = {
+            "pairs": len(comparisons),
+            "seconds": round(seconds, 3),
+            "pairs_per_sec": round(len(comparisons) / seconds, 1) if seconds else None,
+        }
+
+    expected = synthetic_corpus.ground_truth_pairs(manifest)
+    results["accuracy"] = precision_recall(found, expected)
+    for file_type in paths_by_type:
+        prefix = file_type + "_"
+        results["accuracy"][file_type] = precision_recall(
+            {pair for pair in found if pair[0].startswith(prefix)},
+            {pair for pair in expected if pair[0].startswith(prefix)})
+
+    results["memory"] = {
+        "peak_rss_bytes": comparer.peak_rss_bytes(),
+        "worker_peak_rss_bytes": stats.worker_peak_rss,
+    }
+    results["stages"] = stats.report()["stages"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="existing corpus directory with manifest.json "
+                                         "(default: generate one into a temporary directory)")
+    parser.add_argument("--tfidf", choices=["corpus", "pair"], default="corpus")
+    parser.add_argument("--text-features", choices=["text", "hashed"], default="text")
+    parser.add_argument("--workers", type=int, default=None, help="loader processes")
+    parser.add_argument("--no-prefilter", action="store_true", help="parse every file")
+    parser.add_argument("--json", help="also write the results to this file")
+    synthetic_corpus.add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    options = comparer.LoadOptions(workers=args.workers, text_features=args.text_features)
+
+    with tempfile.TemporaryDirectory(prefix="comparer_bench_") as temp_dir:
+        if args.corpus:
+            corpus_dir = args.corpus
+            with open(os.path.join(corpus_dir, "manifest.json")) as f:
+                manifest = json.load(f)
+        else:
+            corpus_dir = temp_dir
+            start = time.perf_counter()
+            manifest = synthetic_corpus.generate_corpus(corpus_dir, synthetic_corpus.params_from_args(args))
+            print(f"Generated {len(manifest['files'])} files in {time.perf_counter() - start:.1f} s",
+                  file=sys.stderr)
+
+        results = {
+            "benchmark": "comparer",
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "corpus": manifest["params"],
+            "settings": {"tfidf": args.tfidf, "text_features": args.text_features,
+                         "workers": options.workers, "prefilter": not args.no_prefilter},
+        }
+        results.update(run_benchmark(corpus_dir, manifest, args.tfidf, options, not args.no_prefilter))
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Startup budget check for office_comparer_batch.py
+
+Measures how long `import office_comparer_batch` takes (python -X importtime)
+and makes sure the heavy parser/ML packages are NOT imported at module load.
+Every Pool worker and every daemon client pays this cost, so on small
+incremental batches it is most of the wall time.
+
+Usage:
+    python benchmarks/startup_budget.py [--budget-ms 150] [--runs 5] [--json results.json]
+
+Exit code 1 if the median import time is over budget or a heavy module
+is imported eagerly.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE = "office_comparer_batch"
+
+# Must only be imported when a file type / scoring step actually needs them
+HEAVY_MODULES = ["docx", "pptx", "openpyxl", "numpy", "sklearn", "scipy"]
+
+
+def measure_import_ms(python=sys.executable):
+    """Cumulative import time of the comparer module in milliseconds (one fresh interpreter)"""
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == MODULE:
+            return int(parts[1]) / 1000.0
+    raise RuntimeError("module not found in -X importtime output")
+
+
+def eager_heavy_modules(python=sys.executable):
+    """Heavy modules that are already loaded right after importing the comparer"""
+    code = (f"import sys, {MODULE}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([python, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="maximum median import time in milliseconds")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    timings = [measure_import_ms() for _ in range(max(1, args.runs))]
+    eager = eager_heavy_modules()
+    median = statistics.median(timings)
+
+    results = {
+        "benchmark": "startup",
+        "import_ms_median": round(median, 2),
+        "import_ms_min": round(min(timings), 2),
+        "import_ms_max": round(max(timings), 2),
+        "budget_ms": args.budget_ms,
+        "eager_heavy_modules": eager,
+        "passed": median <= args.budget_ms and not eager,
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if results["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
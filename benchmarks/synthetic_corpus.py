@@ -0,0 +1,264 @@
+"""
+Synthetic Office corpus generator for the comparer benchmarks
+
+Writes reproducible .docx/.pptx/.xlsx files (same --seed -> same content)
+with controlled sizes, near-duplicate rate and edit distance, plus a
+manifest.json with the ground truth: files of the same family were derived
+from one base document and count as near-duplicates of each other, files
+of different families do not.
+
+Usage:
+    python benchmarks/synthetic_corpus.py OUT_DIR [--files-per-type 40] [--duplicate-rate 0.3]
+                                          [--edit-rate 0.05] [--words 400] [--rows 200] [--seed 1]
+
+Needs python-docx, python-pptx and openpyxl (the comparer's own dependencies).
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import sys
+
+FILE_TYPES = {"word": ".docx", "powerpoint": ".pptx", "excel": ".xlsx"}
+VOCABULARY_SIZE = 5000
+WORDS_PER_PARAGRAPH = 40
+WORDS_PER_SLIDE = 60
+TOPIC_WORDS = 150   # words specific to one base document
+TOPIC_SHARE = 0.6   # fraction of its words taken from them
+SHEET_COLUMNS = 8
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "so", "vi", "pe", "da", "go", "zu",
+             "ber", "tin", "mar", "sol", "ven", "qua", "rix", "dor"]
+
+
+class CorpusParams:
+    """What to generate (see the command line help for the meaning of each value)"""
+
+    def __init__(self, files_per_type=40, duplicate_rate=0.3, edit_rate=0.05, words=400, rows=200,
+                 size_spread=0.5, seed=1, types=tuple(FILE_TYPES)):
+        self.files_per_type = files_per_type
+        self.duplicate_rate = duplicate_rate
+        self.edit_rate = edit_rate
+        self.words = words
+        self.rows = rows
+        self.size_spread = size_spread
+        self.seed = seed
+        self.types = list(types)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def make_vocabulary(rng, size=VOCABULARY_SIZE):
+    """Distinct pronounceable pseudo-words"""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def scaled(rng, mean, spread):
+    """Log-normally spread size around mean (at least 1)"""
+    return max(1, int(round(mean * math.exp(rng.gauss(0.0, spread)))))
+
+
+def random_words(rng, vocabulary, weights, count):
+    # Zipf-like word frequencies, like real text: a few very common words
+    return rng.choices(vocabulary, cum_weights=weights, k=count)
+
+
+def random_document(rng, vocabulary, weights, count):
+    """
+    Text of one unrelated document: common words plus words of its own topic
+    (without a topic, all documents would look alike to TF-IDF)
+    """
+    topic = rng.sample(vocabulary, TOPIC_WORDS)
+    return [rng.choice(topic) if rng.random() < TOPIC_SHARE else word
+            for word in random_words(rng, vocabulary, weights, count)]
+
+
+def edit_words(rng, words, edit_rate, vocabulary, weights):
+    """Apply round(edit_rate * len) random substitutions, insertions and deletions"""
+    words = list(words)
+    for _ in range(int(round(edit_rate * len(words)))):
+        operation = rng.random()
+        position = rng.randrange(len(words) + 1)
+        if operation < 0.5 and position < len(words):
+            words[position] = random_words(rng, vocabulary, weights, 1)[0]
+        elif operation < 0.75 or len(words) <= 1:
+            words.insert(position, random_words(rng, vocabulary, weights, 1)[0])
+        else:
+            del words[min(position, len(words) - 1)]
+    return words
+
+
+def random_cell(rng, column, row):
+    """Cell value of a column type that depends on the column (like real tables)"""
+    kind = column % 4
+    if kind == 0:
+        return row + 1
+    if kind == 1:
+        return round(rng.uniform(0, 10000), 2)
+    if kind == 2:
+        return rng.choice(SYLLABLES) + rng.choice(SYLLABLES) + str(rng.randrange(1000))
+    return datetime.date(2020, 1, 1) + datetime.timedelta(days=rng.randrange(1500))
+
+
+def random_table(rng, rows):
+    return [[random_cell(rng, c, r) for c in range(SHEET_COLUMNS)] for r in range(rows)]
+
+
+def edit_table(rng, table, edit_rate):
+    """Replace round(edit_rate * cells) random cells by new values of the same column type"""
+    table = [list(row) for row in table]
+    cells = len(table) * SHEET_COLUMNS
+    for _ in range(int(round(edit_rate * cells))):
+        r = rng.randrange(len(table))
+        c = rng.randrange(SHEET_COLUMNS)
+        table[r][c] = random_cell(rng, c, r)
+    return table
+
+
+def write_docx(path, words):
+    from docx import Document
+    document = Document()
+    for start in range(0, len(words), WORDS_PER_PARAGRAPH):
+        document.add_paragraph(" ".join(words[start:start + WORDS_PER_PARAGRAPH]))
+    document.save(path)
+
+
+def write_pptx(path, words):
+    from pptx import Presentation
+    from pptx.util import Inches
+    presentation = Presentation()
+    for start in range(0, len(words), WORDS_PER_SLIDE):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])  # blank
+        box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6))
+        box.text_frame.word_wrap = True
+        box.text_frame.text = " ".join(words[start:start + WORDS_PER_SLIDE])
+    presentation.save(path)
+
+
+def write_xlsx(path, table):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Data"
+    sheet.append([f"col{c}" for c in range(SHEET_COLUMNS)])
+    for row in table:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def generate_corpus(out_dir, params):
+    """
+    Write the corpus and its manifest to out_dir
+    Returns the manifest: {"params", "files": [{"path", "type", "family", "base"}]}
+    (paths relative to out_dir)
+    """
+    rng = random.Random(params.seed)
+    vocabulary = make_vocabulary(rng)
+    weights = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1.0 / rank
+        weights.append(total)
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for file_type in params.types:
+        n_variants = int(round(params.duplicate_rate * params.files_per_type))
+        n_bases = max(1, params.files_per_type - n_variants)
+        bases = []  # (family, content)
+
+        for k in range(params.files_per_type):
+            family = f"{file_type}-{k}"
+            base = None
+            if k < n_bases:
+                if file_type == "excel":
+                    content = random_table(rng, scaled(rng, params.rows, params.size_spread))
+                else:
+                    content = random_document(rng, vocabulary, weights,
+                                              scaled(rng, params.words, params.size_spread))
+                bases.append((family, content))
+            else:
+                # Near-duplicate: an edited copy of a random base document
+                family, original = rng.choice(bases)
+                base = family
+                if file_type == "excel":
+                    content = edit_table(rng, original, params.edit_rate)
+                else:
+                    content = edit_words(rng, original, params.edit_rate, vocabulary, weights)
+
+            name = f"{file_type}_{k:04d}{FILE_TYPES[file_type]}"
+            path = os.path.join(out_dir, name)
+            if file_type == "word":
+                write_docx(path, content)
+            elif file_type == "powerpoint":
+                write_pptx(path, content)
+            else:
+                write_xlsx(path, content)
+            files.append({"path": name, "type": file_type, "family": family, "base": base})
+
+    manifest = {"params": params.to_dict(), "files": files}
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def ground_truth_pairs(manifest):
+    """Set of (path1, path2) with path1 < path2 that are near-duplicates by construction"""
+    families = {}
+    for entry in manifest["files"]:
+        families.setdefault((entry["type"], entry["family"]), []).append(entry["path"])
+    pairs = set()
+    for paths in families.values():
+        paths = sorted(paths)
+        for a in range(len(paths)):
+            for b in range(a + 1, len(paths)):
+                pairs.add((paths[a], paths[b]))
+    return pairs
+
+
+def add_corpus_arguments(parser):
+    """Generator options, shared with the benchmark script"""
+    parser.add_argument("--files-per-type", type=int, default=40, help="files of every type")
+    parser.add_argument("--types", default=",".join(FILE_TYPES),
+                        help="comma-separated file types (word, powerpoint, excel)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.3,
+                        help="fraction of files that are edited copies of another file")
+    parser.add_argument("--edit-rate", type=float, default=0.05,
+                        help="edits per word (Word/PowerPoint) or per cell (Excel) in a copy")
+    parser.add_argument("--words", type=int, default=400, help="mean words per document")
+    parser.add_argument("--rows", type=int, default=200, help="mean rows per workbook")
+    parser.add_argument("--size-spread", type=float, default=0.5,
+                        help="sigma of the log-normal size distribution (0 = all the same size)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (same seed -> same corpus)")
+
+
+def params_from_args(args):
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = [t for t in types if t not in FILE_TYPES]
+    if unknown:
+        raise SystemExit(f"unknown file type(s): {', '.join(unknown)}")
+    return CorpusParams(files_per_type=args.files_per_type, duplicate_rate=args.duplicate_rate,
+                        edit_rate=args.edit_rate, words=args.words, rows=args.rows,
+                        size_spread=args.size_spread, seed=args.seed, types=types)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir", help="directory for the generated files and manifest.json")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.out_dir, params_from_args(args))
+    print(f"{len(manifest['files'])} files, {len(ground_truth_pairs(manifest))} near-duplicate pairs "
+          f"written to {args.out_dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
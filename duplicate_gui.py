@@ -1,17 +1,446 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import subprocess
+import json
 import os
 import threading
 import time
 import threading
 import queue
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+RESULT_INSERT_BUDGET = 0.03  # seconds of tree inserts per GUI tick, keeps the window responsive
+STAT_WORKERS = 16            # parallel stat threads (one directory per task)
+SCANDIR_MIN_FILES = 8        # list the directory instead of stat'ing files one by one
+DELETE_WORKERS = 8           # parallel deletion threads (one directory per task)
+SEARCH_DELAY_MS = 150        # wait for the user to stop typing before searching
+
+
+def format_space(size):
+    if size > 1024**3:  # > 1 GB
+        return f"{size / (1024**3):.2f} GB"
+    if size > 1024**2:  # > 1 MB
+        return f"{size / (1024**2):.2f} MB"
+    return f"{size / 1024:.2f} KB"
+
+
+class FileMetadata:
+    """
+    File sizes of the current scan, shared by every view
+    Sizes come from the backend output; missing ones are read by
+    prefetch() in a thread pool, one task per directory, so a network
+    share sees a few directory listings instead of one round trip per file.
+    """
+
+    def __init__(self):
+        self.sizes = {}
+        self.lock = threading.Lock()
+
+    def set_size(self, file_path, size):
+        self.sizes[file_path] = size
+
+    def size(self, file_path):
+        """Size in bytes (0 if missing); unknown files are stat'ed right away"""
+        size = self.sizes.get(file_path)
+        if size is None:
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                size = 0
+            self.sizes[file_path] = size
+        return size
+
+    def remove(self, file_path):
+        """The file was deleted"""
+        self.sizes[file_path] = 0
+
+    def prefetch(self, paths):
+        """Read the unknown sizes in the background; returns the futures to wait for"""
+        by_directory = {}
+        for file_path in paths:
+            if file_path not in self.sizes:
+                by_directory.setdefault(os.path.dirname(file_path), []).append(file_path)
+        if not by_directory:
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=min(STAT_WORKERS, len(by_directory)))
+        futures = [executor.submit(self.stat_directory, directory, files)
+                   for directory, files in by_directory.items()]
+        executor.shutdown(wait=False)
+        return futures
+
+    def stat_directory(self, directory, files):
+        sizes = dict.fromkeys(files)
+        if len(files) >= SCANDIR_MIN_FILES:
+            # One listing; on Windows the entries already carry the sizes
+            try:
+                with os.scandir(directory or ".") as entries:
+                    for entry in entries:
+                        if entry.path in sizes:
+                            try:
+                                sizes[entry.path] = entry.stat().st_size
+                            except OSError:
+                                pass
+            except OSError:
+                pass
+        for file_path, size in sizes.items():
+            if size is None:
+                try:
+                    sizes[file_path] = os.stat(file_path).st_size
+                except OSError:
+                    sizes[file_path] = 0
+        with self.lock:
+            self.sizes.update(sizes)
+
+
+class DeletionJob:
+    """
+    Deletes files in a thread pool, one task per directory
+    Every removal is reported as (path, error or None) on self.queue, which
+    the GUI thread polls like the scan output; cancel() stops all tasks
+    before their next file.
+    """
+
+    def __init__(self, paths):
+        self.queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.total = len(paths)
+        self.start_time = time.time()
+
+        by_directory = {}
+        for file_path in paths:
+            by_directory.setdefault(os.path.dirname(file_path), []).append(file_path)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(DELETE_WORKERS, len(by_directory))))
+        self.futures = [executor.submit(self.delete_files, files) for files in by_directory.values()]
+        executor.shutdown(wait=False)
+
+    def delete_files(self, files):
+        for file_path in files:
+            if self.cancelled.is_set():
+                return
+            try:
+                os.remove(file_path)
+                self.queue.put((file_path, None))
+            except OSError as e:
+                self.queue.put((file_path, str(e)))
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+
+def parse_float(text, default=None):
+    """float(text), or default if text is not a number"""
+    try:
+        return float(text)
+    except ValueError:
+        return default
+
+
+def glob_regex(pattern):
+    """Regex for a lower-case glob (* and ?) that matches whole lines of a newline-joined text"""
+    body = "".join("[^\n]*" if c == "*" else "[^\n]" if c == "?" else re.escape(c) for c in pattern)
+    return re.compile("^" + body + "$", re.M)
+
+
+class PathIndex:
+    """
+    Search index over the result paths, built once per scan (on first search)
+    - every path (and every file name) lower-cased in one newline-separated
+      string, so substring and glob searches run in C (str.find / re)
+      instead of once per path
+    - extension -> slots and directory -> slots, directories sorted for
+      prefix lookups
+    Query forms: "ext:jpg", "dir:/photos" (with subdirectories), a glob
+    with * or ? (on the file name, or on the full path if it contains a
+    separator), or else a case-insensitive substring of the path.
+    """
+
+    def __init__(self, paths):
+        self.starts = array('q')       # offset of every slot's line in self.text
+        self.name_starts = array('q')  # ... and in self.names
+        self.extensions = {}
+        self.directories = {}
+        lines = []
+        names = []
+        offset = name_offset = 0
+        for slot, file_path in enumerate(paths):
+            line = file_path.lower() if file_path is not None else ""
+            directory, name = os.path.split(line)
+            self.starts.append(offset)
+            self.name_starts.append(name_offset)
+            lines.append(line)
+            names.append(name)
+            offset += len(line) + 1
+            name_offset += len(name) + 1
+            if file_path is not None:
+                self.extensions.setdefault(os.path.splitext(name)[1][1:], array('q')).append(slot)
+                self.directories.setdefault(directory, array('q')).append(slot)
+        self.text = "\n".join(lines)
+        self.names = "\n".join(names)
+        self.sorted_directories = sorted(self.directories)
+
+    def slot_at(self, offset, starts=None):
+        return bisect_right(self.starts if starts is None else starts, offset) - 1
+
+    def search(self, query):
+        """Slots of the matching paths, in ascending order"""
+        query = query.strip().lower()
+        if query.startswith("ext:"):
+            return list(self.extensions.get(query[4:].strip().lstrip("."), ()))
+
+        if query.startswith("dir:"):
+            prefix = query[4:].strip().rstrip("/\\")
+            slots = []
+            i = bisect_left(self.sorted_directories, prefix)
+            while i < len(self.sorted_directories) and self.sorted_directories[i].startswith(prefix):
+                directory = self.sorted_directories[i]
+                if len(directory) == len(prefix) or directory[len(prefix)] in "/\\":
+                    slots.extend(self.directories[directory])
+                i += 1
+            return sorted(slots)
+
+        if "*" in query or "?" in query:
+            if "/" in query or "\\" in query:
+                text, starts = self.text, self.starts
+            else:
+                text, starts = self.names, self.name_starts
+            return [self.slot_at(match.start(), starts) for match in glob_regex(query).finditer(text)]
+
+        # Substring: one find per matching line
+        slots = []
+        position = self.text.find(query)
+        while position != -1:
+            slot = self.slot_at(position)
+            slots.append(slot)
+            if slot + 1 >= len(self.starts):
+                break
+            position = self.text.find(query, self.starts[slot + 1])
+        return slots
+
+
+class ResultStore:
+    """
+    Scan results in flat arrays instead of one object per file
+    Group g owns the file slots offsets[g]:offsets[g + 1]; a removed file
+    keeps its slot (path None) so all indices stay valid.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.similarities = array('f')
+        self.offsets = array('q', [0])
+        self.types = []                    # "EXACT" or "SIMILAR" per group
+        self.type_groups = {"EXACT": array('l'), "SIMILAR": array('l')}  # groups of each type
+        self.group_similarity = array('f')
+        self.live_files = array('l')       # files of the group that were not removed
+
+    def __len__(self):
+        return len(self.types)
+
+    def add_group(self, group_type, group_similarity, files):
+        """Append a group of (path, similarity) and return its index"""
+        for file_path, file_sim in files:
+            self.paths.append(file_path)
+            self.similarities.append(file_sim)
+        self.offsets.append(len(self.paths))
+        self.types.append(group_type)
+        self.type_groups.setdefault(group_type, array('l')).append(len(self.types) - 1)
+        self.group_similarity.append(group_similarity)
+        self.live_files.append(len(files))
+        return len(self.types) - 1
+
+    def file_slots(self, g):
+        """Slots of the files of group g that were not removed"""
+        return [i for i in range(self.offsets[g], self.offsets[g + 1]) if self.paths[i] is not None]
+
+    def files(self, g):
+        return [(self.paths[i], self.similarities[i]) for i in self.file_slots(g)]
+
+    def group_of(self, slot):
+        return bisect_right(self.offsets, slot) - 1
+
+    def is_shown(self, g):
+        # A group with one file left is no longer a duplicate
+        return self.live_files[g] > 1
+
+    def remove_file(self, slot):
+        if self.paths[slot] is not None:
+            self.paths[slot] = None
+            self.live_files[self.group_of(slot)] -= 1
+
+    def groups(self):
+        """(type, similarity, [(path, similarity), ...]) of every shown group"""
+        for g in range(len(self.types)):
+            if self.is_shown(g):
+                yield self.types[g], self.group_similarity[g], self.files(g)
+
+
+class VirtualResultView:
+    """
+    Result list that only has Treeview items for the rows on screen
+    Rows are ints: a file slot of the ResultStore, or -1 - g for the
+    header of group g. Scrolling re-labels the same few items, so the
+    widget cost does not grow with the number of results.
+    """
+    COLUMNS = ("path", "size", "similarity")
+
+    def __init__(self, parent, format_row):
+        self.format_row = format_row   # row -> (text, values, tags)
+        self.rows = array('q')
+        self.first = 0                 # row shown in the top line
+        self.selected = None           # selected row
+        self.items = []                # one Treeview item per line on screen
+
+        self.tree = ttk.Treeview(parent, columns=self.COLUMNS, show="tree headings",
+                                 height=20, selectmode="browse")
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<ButtonPress-1>", self.on_click)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", self.on_mousewheel)
+        self.tree.bind("<Button-5>", self.on_mousewheel)
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-len(self.items)))
+        self.tree.bind("<Next>", lambda e: self.move_selection(len(self.items)))
+        self.tree.bind("<Home>", lambda e: self.move_selection(-len(self.rows)))
+        self.tree.bind("<End>", lambda e: self.move_selection(len(self.rows)))
+
+    def set_rows(self, rows, keep_position=False):
+        """Replace all rows (e.g. after a filter change)"""
+        self.rows = rows
+        if not keep_position:
+            self.first = 0
+            self.selected = None
+        elif self.selected is not None and self.selected >= len(rows):
+            self.selected = None
+        self.render()
+
+    def append_rows(self, rows):
+        """Add rows at the end; call render() once after a batch"""
+        self.rows.extend(rows)
+
+    def remove_rows(self, positions):
+        """Remove rows by position in one pass, keeping the view in place"""
+        if not positions:
+            return
+        positions = sorted(set(positions))
+        kept = array('q')
+        start = 0
+        for position in positions:
+            kept += self.rows[start:position]
+            start = position + 1
+        kept += self.rows[start:]
+        self.rows = kept
+
+        self.first -= bisect_right(positions, self.first - 1)
+        if self.selected is not None:
+            removed_before = bisect_right(positions, self.selected)
+            if positions[removed_before - 1:removed_before] == [self.selected]:
+                self.selected = None
+            else:
+                self.selected -= removed_before
+        self.render()
+
+    def row_at(self, y):
+        """Row under a y coordinate of the tree, or None"""
+        item = self.tree.identify_row(y)
+        if item not in self.items:
+            return None
+        row = self.first + self.items.index(item)
+        return row if row < len(self.rows) else None
+
+    def select(self, row):
+        """Select a row and scroll it into view"""
+        self.selected = row
+        if row < self.first:
+            self.first = row
+        elif row >= self.first + len(self.items):
+            self.first = row - len(self.items) + 1
+        self.render()
+
+    def render(self):
+        """Show the rows from self.first in the existing items"""
+        total = len(self.rows)
+        self.first = max(0, min(self.first, total - len(self.items)))
+        for line, item in enumerate(self.items):
+            row = self.first + line
+            if row < total:
+                text, values, tags = self.format_row(self.rows[row])
+                self.tree.item(item, text=text, values=values, tags=tags)
+                self.tree.move(item, '', line)
+            else:
+                self.tree.detach(item)
+
+        if self.selected is not None and 0 <= self.selected - self.first < len(self.items):
+            self.tree.selection_set(self.items[self.selected - self.first])
+        else:
+            self.tree.selection_set(())
+
+        if total > len(self.items):
+            self.scrollbar.set(self.first / total, (self.first + len(self.items)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_resize(self, event):
+        # Lines that fit below the headings
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        lines = max(1, (event.height - row_height) // row_height)
+        while len(self.items) < lines:
+            self.items.append(self.tree.insert("", "end", text=""))
+        while len(self.items) > lines:
+            self.tree.delete(self.items.pop())
+        self.render()
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = len(self.items) if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self.render()
+
+    def on_mousewheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.first -= 3
+        else:
+            self.first += 3
+        self.render()
+        return "break"
+
+    def on_click(self, event):
+        # Headings and column separators keep their normal behaviour
+        if self.tree.identify_region(event.x, event.y) not in ("tree", "cell"):
+            return None
+        row = self.row_at(event.y)
+        if row is not None:
+            self.select(row)
+        self.tree.focus_set()
+        return "break"
+
+    def move_selection(self, step):
+        if self.rows:
+            row = 0 if self.selected is None else self.selected + step
+            self.select(max(0, min(row, len(self.rows) - 1)))
+        return "break"
 
 
 class DuplicateFinderGUI:
     def __init__(self, root):
         self.root = root
-        self.file_sizes = {}  # key: file_path, value: file size in bytes
+        self.metadata = FileMetadata()  # file sizes, shared by all views
+        self.size_futures = []
         self.root.title("Duplicate File Finder - C++ Backend")
         self.root.geometry("1200x750")
         
@@ -28,9 +457,31 @@ class DuplicateFinderGUI:
         # Variables for live output processing
         self.stdout_queue = queue.Queue(maxsize=1000)  # prevent too large queue
         self.stderr_queue = queue.Queue(maxsize=1000)
-        self.stdout_buffer = ""
         self.stderr_buffer = ""
-        # prevent too large queue
+        self.stdout_thread = None
+        self.quarantined_files = []   # (path, reason) the Office comparer did not load
+        
+        # Incremental result parsing: groups are parsed as their ---GROUP---
+        # marker arrives and inserted into the tree a few at a time
+        self.current_group = []
+        self.current_group_type = "EXACT"
+        self.current_group_similarity = 1.0
+        self.pending_groups = []      # parsed, not yet in the result list
+        self.exact_count = 0
+        self.similar_count = 0
+        self.path_index = None        # PathIndex of the results, built on first search
+        
+        # Statistics of the shown groups, updated per group on deletions
+        self.stat_groups = {"EXACT": 0, "SIMILAR": 0}
+        self.stat_files = {"EXACT": 0, "SIMILAR": 0}
+        self.wasted_space = 0
+        
+        # Running background deletion (DeletionJob) and what it affects
+        self.deletion = None
+        self.deletion_slots = {}
+        self.deletion_errors = []
+        self.deleted_count = 0
+        self.freed_space = 0
         
         # Progress tracking variables
         self.total_files = 0
@@ -88,6 +539,14 @@ class DuplicateFinderGUI:
         ttk.Radiobutton(filter_frame, text="Similar Files Only", variable=self.filter_var, 
                        value="similar", command=self.apply_filter).pack(side=tk.LEFT, padx=5)
         
+        # Search over the result paths: text, *.glob, ext:jpg or dir:/path
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(filter_frame, text="🔍 Search:").pack(side=tk.RIGHT)
+        self.search_var.trace_add("write", self.on_search_changed)
+        self.search_after_id = None
+        
         # Statistics frame
         stats_frame = ttk.LabelFrame(main_frame, text="Statistics", padding="5")
         stats_frame.pack(fill=tk.X, pady=5)
@@ -107,14 +566,9 @@ class DuplicateFinderGUI:
         results_frame = ttk.LabelFrame(main_frame, text="Results", padding="5")
         results_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
-        # Treeview with path column
-        self.tree = ttk.Treeview(results_frame, columns=("path", "size", "similarity"), 
-                                show="tree headings", height=20)
-        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        
-        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Virtual result list: only the visible rows are Treeview items
+        self.view = VirtualResultView(results_frame, self.format_row)
+        self.tree = self.view.tree
         
         self.tree.heading("#0", text="File Name")
         self.tree.column("#0", width=350)
@@ -124,6 +578,7 @@ class DuplicateFinderGUI:
         self.tree.column("size", width=100)
         self.tree.heading("similarity", text="Similarity")
         self.tree.column("similarity", width=100)
+        self.tree.tag_configure('group', font=('TkDefaultFont', 10, 'bold'))
         
         # Bind right-click for context menu
         self.tree.bind("<Button-3>", self.show_context_menu)
@@ -132,38 +587,39 @@ class DuplicateFinderGUI:
         status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
         status_bar.pack(fill=tk.X, pady=5)
         
-        self.duplicate_groups = []
-        self.group_items = {}  # Map tree items to group data
+        self.results = ResultStore()
+        self.group_numbers = array('l')  # "#n" label of every group
         
     def show_context_menu(self, event):
         """Show context menu on right-click"""
-        item = self.tree.identify_row(event.y)
-        if item:
-            self.tree.selection_set(item)
+        row = self.view.row_at(event.y)
+        if row is not None:
+            self.view.select(row)
+            entry = self.view.rows[row]
             menu = tk.Menu(self.root, tearoff=0)
             
             # Check if it's a group header or file
-            if item in self.group_items:
+            if entry < 0:
                 menu.add_command(label="Delete This Group", command=self.delete_selected_group)
             else:
-                menu.add_command(label="Open File Location", command=lambda: self.open_file_location(item))
-                menu.add_command(label="Delete This File", command=lambda: self.delete_single_file(item))
+                menu.add_command(label="Open File Location", command=lambda: self.open_file_location(entry))
+                menu.add_command(label="Delete This File", command=lambda: self.delete_single_file(entry))
             
             menu.post(event.x_root, event.y_root)
-    
-    def open_file_location(self, item):
+
+    def open_file_location(self, slot):
         """Open the folder containing the file"""
-        file_path = self.tree.set(item, "path")
+        file_path = self.results.paths[slot]
         if file_path and os.path.exists(file_path):
             if os.name == 'nt':  # Windows
                 os.startfile(os.path.dirname(file_path))
             else:  # macOS/Linux
                 subprocess.run(['xdg-open', os.path.dirname(file_path)])
-    
-    def delete_single_file(self, item):
+
+    def delete_single_file(self, slot):
         """Delete a single file"""
-        file_path = self.tree.set(item, "path")
-        filename = self.tree.item(item, "text")
+        file_path = self.results.paths[slot]
+        filename = os.path.basename(file_path)
         
         confirm = messagebox.askyesno(
             "Confirm Deletion",
@@ -173,12 +629,11 @@ class DuplicateFinderGUI:
         if confirm:
             try:
                 os.remove(file_path)
-                self.tree.delete(item)
+                self.remove_deleted_files([slot])
                 messagebox.showinfo("Success", "File deleted successfully")
-                self.update_statistics()  # Update stats after deletion
             except Exception as e:
                 messagebox.showerror("Error", f"Could not delete file: {e}")
-        
+
     def browse_directory(self):
         directory = filedialog.askdirectory(title="Select Directory to Scan")
         if directory:
@@ -186,18 +641,28 @@ class DuplicateFinderGUI:
             self.status_var.set(f"Selected directory: {directory}")
     
     def cancel_scan(self):
-        """Cancel the running scan"""
+        """Cancel the running scan and deletion"""
         if self.scanning and self.process:
             try:
                 self.process.terminate()
                 self.scanning = False
-                self.progress_frame.pack_forget()
+                if not self.deletion:
+                    self.progress_frame.pack_forget()
                 self.status_var.set("Scan cancelled by user")
-                self.scan_button.config(state=tk.NORMAL)
-                self.cancel_button.config(state=tk.DISABLED)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to cancel scan: {e}")
-    
+        
+        if self.deletion:
+            self.deletion.cancel()
+            self.status_var.set("Cancelling deletion...")
+        self.update_buttons()
+
+    def update_buttons(self):
+        """Scan/Cancel state for the running jobs (a group can be deleted during a scan)"""
+        busy = self.scanning or self.deletion is not None
+        self.scan_button.config(state=tk.DISABLED if busy else tk.NORMAL)
+        self.cancel_button.config(state=tk.NORMAL if busy else tk.DISABLED)
+
     def update_progress(self):
         if self.scanning:
             total_done = self.processed_files + self.processed_comparisons
@@ -212,6 +677,10 @@ class DuplicateFinderGUI:
             else:
                 self.status_var.set("Scanning...")
             
+            found = self.exact_count + self.similar_count
+            if found:
+                self.status_var.set(f"{self.status_var.get()} | 🔎 {found} groups found")
+            
             self.root.after(1000, self.update_progress)
     def scan_duplicates(self):
         directory = self.dir_var.get()
@@ -227,14 +696,17 @@ class DuplicateFinderGUI:
             messagebox.showinfo("Info", "Scan already in progress")
             return
         
+        if self.deletion:
+            messagebox.showinfo("Info", "Please wait until the deletion has finished")
+            return
+        
         self.clear_results()
         self.scanning = True
-        self.scan_button.config(state=tk.DISABLED)
-        self.cancel_button.config(state=tk.NORMAL)
+        self.update_buttons()
         
         # RESET buffers for new scan
-        self.stdout_buffer = ""
         self.stderr_buffer = ""
+        self.quarantined_files = []
         
         # Reset progress counters
         self.total_files = 0
@@ -270,13 +742,13 @@ class DuplicateFinderGUI:
             )
             
             # Start threads to read stdout and stderr in real-time
-            stdout_thread = threading.Thread(target=self.read_stdout)
+            self.stdout_thread = threading.Thread(target=self.read_stdout)
             stderr_thread = threading.Thread(target=self.read_stderr)
             
-            stdout_thread.daemon = True
+            self.stdout_thread.daemon = True
             stderr_thread.daemon = True
             
-            stdout_thread.start()
+            self.stdout_thread.start()
             stderr_thread.start()
             
             # Start processing the output queues in GUI thread
@@ -285,8 +757,7 @@ class DuplicateFinderGUI:
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to run C++ backend: {e}"))
             self.scanning = False
-            self.scan_button.config(state=tk.NORMAL)
-            self.cancel_button.config(state=tk.DISABLED)
+            self.root.after(0, self.update_buttons)
     
     def read_stdout(self):
         """Read stdout in real-time for results"""
@@ -316,16 +787,19 @@ class DuplicateFinderGUI:
             except queue.Empty:
                 break
         
-        # Process all stdout messages (results)
+        # Process all stdout messages (results), groups are complete at their marker
         while not self.stdout_queue.empty():
             try:
                 line = self.stdout_queue.get_nowait()
-                self.stdout_buffer += line + "\n"
+                self.parse_result_line(line)
             except queue.Empty:
                 break
         
-        # Check if process is still running
-        if self.process.poll() is None:
+        self.insert_pending_groups()
+        
+        # Check if process is still running (or its last lines are still being read)
+        if (self.process.poll() is None or self.stdout_thread.is_alive()
+                or not self.stdout_queue.empty()):
             # Process still running, check again in 100ms
             self.root.after(100, self.process_queues)
         else:
@@ -336,6 +810,15 @@ class DuplicateFinderGUI:
         """Process progress lines from C++ and update counters"""
         line = line.strip()
         
+        if line.startswith('{"quarantined"'):
+            # Forwarded from the Office comparer: this file was not compared
+            try:
+                record = json.loads(line)
+                self.quarantined_files.append((record["quarantined"], record.get("reason", "")))
+            except (ValueError, KeyError):
+                pass
+            return
+        
         if line.startswith("TOTAL_WORK:"):
             try:
                 self.total_work = int(line.split(':')[1])
@@ -365,9 +848,9 @@ class DuplicateFinderGUI:
         """Final completion handler after process ends"""
         self.scanning = False
         self.progress_bar.stop()
-        self.progress_frame.pack_forget()
-        self.scan_button.config(state=tk.NORMAL)
-        self.cancel_button.config(state=tk.DISABLED)
+        if not self.deletion:
+            self.progress_frame.pack_forget()
+        self.update_buttons()
         
         # Check for errors
         if self.process.returncode != 0:
@@ -378,192 +861,125 @@ class DuplicateFinderGUI:
             self.status_var.set("Scan failed")
             return
         
-        # Parse and display results
-        self.parse_results(self.stdout_buffer)
+        # A last group without marker is complete now
+        self.finish_group()
+        self.status_var.set("Displaying results...")
+        self.finish_display()
     
-    def parse_results(self, output):
-        self.status_var.set("Processing results...")
-        self.root.update_idletasks()
-        
-        groups = []
-        current_group = []
-        group_type = "EXACT"
-        group_similarity = 1.0
-        
-        for line in output.strip().split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith("EXACT|") or line.startswith("SIMILAR|"):
-                parts = line.split('|')
-                group_type = parts[0]
-                group_similarity = float(parts[1]) if len(parts) > 1 else 1.0
-            elif line == "---GROUP---":
-                if current_group:
-                    groups.append((group_type, group_similarity, current_group))
-                    current_group = []
-            else:
-                parts = line.split('|')
-                file_path = parts[0]
-                file_sim = float(parts[1]) if len(parts) > 1 else group_similarity
-                current_group.append((file_path, file_sim))
-        
-        if current_group:
-            groups.append((group_type, group_similarity, current_group))
-        
-        self.duplicate_groups = groups
-        self.display_results()
+    def finish_display(self):
+        """Insert the remaining groups in time-budgeted steps, then show the summary"""
+        if self.insert_pending_groups():
+            self.display_results()
+        else:
+            self.root.after(1, self.finish_display)
     
-    def calculate_wasted_space(self):
-        """Calculate total space wasted by duplicates"""
-        total_wasted = 0
-        
-        # Precompute all file sizes to avoid multiple os.path.getsize calls
-        file_sizes = {}
-        for _, _, group in self.duplicate_groups:
-            for file_path, _ in group:
-                if file_path not in file_sizes:
-                    try:
-                        file_sizes[file_path] = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                    except:
-                        file_sizes[file_path] = 0
-        
-        # Calculate wasted space for exact duplicates
-        for group_type, group_similarity, group in self.duplicate_groups:
-            if group_type == "EXACT" and len(group) > 1:
-                first_file = group[0][0]
-                # Use precomputed file size from file_sizes (NOT self.file_sizes!)
-                file_size = file_sizes.get(first_file, 0)  # ← Ändere self.file_sizes zu file_sizes
-                total_wasted += file_size * (len(group) - 1)
-        
-        return total_wasted
+    def parse_result_line(self, line):
+        """Parse one stdout line of the C++ backend"""
+        line = line.strip()
+        if not line:
+            return
+        
+        if line.startswith("EXACT|") or line.startswith("SIMILAR|"):
+            group_type, _, similarity = line.partition('|')
+            self.current_group_type = group_type
+            self.current_group_similarity = parse_float(similarity, 1.0)
+        elif line == "---GROUP---":
+            self.finish_group()
+        else:
+            # path[|similarity[|size in bytes]], split from the right: paths may contain '|'
+            file_path = line
+            file_sim = self.current_group_similarity
+            parts = line.rsplit('|', 2)
+            if len(parts) == 3 and parts[2].isdigit() and parse_float(parts[1]) is not None:
+                file_path, file_sim = parts[0], parse_float(parts[1])
+                self.metadata.set_size(file_path, int(parts[2]))
+            else:
+                parts = line.rsplit('|', 1)
+                if len(parts) == 2 and parse_float(parts[1]) is not None:
+                    file_path, file_sim = parts[0], parse_float(parts[1])
+            self.current_group.append((file_path, file_sim))
 
+    def finish_group(self):
+        """Queue the group parsed so far for insertion"""
+        if self.current_group:
+            self.pending_groups.append((self.current_group_type, self.current_group_similarity,
+                                        self.current_group))
+            self.current_group = []
+
+    def insert_pending_groups(self):
+        """
+        Add parsed groups to the result list until RESULT_INSERT_BUDGET is used up
+        Returns True when no group is left
+        """
+        deadline = time.perf_counter() + RESULT_INSERT_BUDGET
+        inserted = 0
+        while inserted < len(self.pending_groups) and time.perf_counter() < deadline:
+            self.insert_group(*self.pending_groups[inserted])
+            inserted += 1
+        del self.pending_groups[:inserted]
+        if inserted:
+            self.view.render()
+        return not self.pending_groups
+
+    def group_statistics(self, g):
+        """(type, files, wasted bytes) that group g adds to the statistics"""
+        group_type = self.results.types[g]
+        if not self.results.is_shown(g):
+            return group_type, 0, 0
+        slots = self.results.file_slots(g)
+        wasted = 0
+        if group_type == "EXACT":
+            wasted = self.file_size(self.results.paths[slots[0]]) * (len(slots) - 1)
+        return group_type, len(slots), wasted
+
+    def add_group_statistics(self, g, sign=1):
+        group_type, files, wasted = self.group_statistics(g)
+        if files:
+            self.stat_groups[group_type] += sign
+            self.stat_files[group_type] += sign * files
+            self.wasted_space += sign * wasted
 
-    
     def update_statistics(self):
-        """Update statistics display efficiently"""
-        exact_count = 0
-        similar_count = 0
-        exact_files = 0
-        similar_files = 0
-
-        # Count groups and files
-        for group_type, group_similarity, group in self.duplicate_groups:
-            if len(group) > 1:
-                num_files = len(group)
-                if group_type == "EXACT":
-                    exact_count += 1
-                    exact_files += num_files
-                else:
-                    similar_count += 1
-                    similar_files += num_files
+        """Recount the statistics of all groups and show them"""
+        self.stat_groups = {"EXACT": 0, "SIMILAR": 0}
+        self.stat_files = {"EXACT": 0, "SIMILAR": 0}
+        self.wasted_space = 0
+        for g in range(len(self.results)):
+            self.add_group_statistics(g)
+        self.show_statistics()
 
-        # Calculate wasted space
-        wasted_space = self.calculate_wasted_space()
+    def show_statistics(self):
+        """Statistics display from the current counters"""
+        exact_count = self.stat_groups["EXACT"]
+        similar_count = self.stat_groups["SIMILAR"]
 
         # Build statistics string
         stats_parts = []
         if exact_count > 0:
-            stats_parts.append(f"🔴 {exact_count} exact duplicate groups ({exact_files} files)")
+            stats_parts.append(f"🔴 {exact_count} exact duplicate groups ({self.stat_files['EXACT']} files)")
         if similar_count > 0:
-            stats_parts.append(f"🟡 {similar_count} similar file groups ({similar_files} files)")
+            stats_parts.append(f"🟡 {similar_count} similar file groups ({self.stat_files['SIMILAR']} files)")
             
-        wasted_space = self.calculate_wasted_space()  # exact duplicates only
-        if wasted_space > 0:
-            if wasted_space > 1024**3:  # > 1 GB
-                space_str = f"{wasted_space / (1024**3):.2f} GB"
-            elif wasted_space > 1024**2:  # > 1 MB
-                space_str = f"{wasted_space / (1024**2):.2f} MB"
-            else:
-                space_str = f"{wasted_space / 1024:.2f} KB"
-            stats_parts.append(f"💾 Can free up: {space_str}")
+        if self.wasted_space > 0:  # exact duplicates only
+            stats_parts.append(f"💾 Can free up: {format_space(self.wasted_space)}")
 
         stats_text = " | ".join(stats_parts) if stats_parts else "No duplicates or similar files found"
 
         # Update GUI variable once
         self.stats_var.set(stats_text)
 
-
     def apply_filter(self):
         """
-        Filter the displayed duplicates by type (all/exact/similar).
-        Uses detach/reattach instead of deleting Treeview items for better performance.
-        Precomputes file sizes to avoid repeated os.path.getsize calls.
+        Filter the displayed duplicates by type (all/exact/similar) and search.
+        Only the row list is rebuilt from the indexes; the view re-labels its
+        visible items.
         """
-        filter_mode = self.filter_var.get()  # "all", "exact", or "similar"
-
-        filtered_exact_count = 0
-        filtered_similar_count = 0
-
-        # Precompute file sizes to avoid repeated os.path.getsize calls
-        file_sizes = {}
-        for group_type, group_similarity, group in self.duplicate_groups:
-            for file_path, _ in group:
-                if file_path not in file_sizes:
-                    try:
-                        file_sizes[file_path] = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                    except:
-                        file_sizes[file_path] = 0
-
-        # Iterate over all existing group items
-        for group_item, (group_type, group_similarity, group) in self.group_items.items():
-            # Check if group should be shown based on filter
-            show_group = False
-            if filter_mode == "all":
-                show_group = True
-            elif filter_mode == "exact" and group_type == "EXACT":
-                show_group = True
-            elif filter_mode == "similar" and group_type == "SIMILAR":
-                show_group = True
-
-            if show_group and len(group) > 1:
-                # Update group label and similarity display
-                if group_type == "EXACT":
-                    filtered_exact_count += 1
-                    label = f"🔴 Exact Duplicates #{filtered_exact_count} ({len(group)} files)"
-                    group_sim_display = "100%"
-                else:
-                    filtered_similar_count += 1
-                    avg_sim = sum(sim for _, sim in group) / len(group)
-                    label = f"🟡 Similar Files #{filtered_similar_count} ({len(group)} files) - Similarity: {avg_sim*100:.0f}%"
-                    group_sim_display = f"{avg_sim*100:.0f}%"
-
-                # Reattach group if detached
-                self.tree.reattach(group_item, '', 'end')
-                self.tree.item(group_item, text=label, values=("", "", group_sim_display))
-
-                # Update children
-                children = self.tree.get_children(group_item)
-                for i, (file_path, file_sim) in enumerate(group):
-                    size_str = f"{file_sizes[file_path] / 1024:.1f} KB" if file_sizes[file_path] > 0 else "N/A"
-                    sim_str = f"{file_sim*100:.0f}%" if group_type == "SIMILAR" else "100%"
-                    filename = os.path.basename(file_path)
-                    directory = os.path.dirname(file_path)
-
-                    if i < len(children):
-                        child_item = children[i]
-                        self.tree.item(child_item, text=f"  📄 {filename}", values=(directory, size_str, sim_str))
-                        self.tree.set(child_item, "path", file_path)
-                    else:
-                        # Insert any extra files if needed
-                        file_item = self.tree.insert(group_item, "end",
-                                                    text=f"  📄 {filename}",
-                                                    values=(directory, size_str, sim_str))
-                        self.tree.set(file_item, "path", file_path)
-
-                self.tree.item(group_item, open=True)
-            else:
-                # Detach group if filter doesn't match
-                self.tree.detach(group_item)
-
-        # Update column visibility and redraw
-        self.tree.config(displaycolumns=("path", "size", "similarity"))
-        self.tree.tag_configure('group', font=('TkDefaultFont', 10, 'bold'))
-        self.tree.update_idletasks()
+        self.search_after_id = None
+        rows, filtered_exact_count, filtered_similar_count = self.build_rows()
+        self.view.set_rows(rows)
 
         # Update statistics and status
-        self.update_statistics()
+        self.show_statistics()
         
         status_parts = []
         if filtered_exact_count > 0:
@@ -571,81 +987,197 @@ class DuplicateFinderGUI:
         if filtered_similar_count > 0:
             status_parts.append(f"{filtered_similar_count} similar file groups")
         
+        search = self.search_var.get().strip()
         if status_parts:
-            self.status_var.set(f"✅ Showing: {' and '.join(status_parts)}")
+            status = f"✅ Showing: {' and '.join(status_parts)}"
+            if search:
+                status += f" matching '{search}'"
+            self.status_var.set(status)
         else:
             self.status_var.set("No results match the current filter")
 
+    def on_search_changed(self, *args):
+        # Search once typing pauses
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DELAY_MS, self.apply_filter)
+
+    def filter_matches(self, group_type):
+        filter_mode = self.filter_var.get()  # "all", "exact", or "similar"
+        return filter_mode == "all" or filter_mode == group_type.lower()
+
+    def build_rows(self):
+        """Rows of all shown groups that match the filter and search, with the group counts per type"""
+        filter_mode = self.filter_var.get()
+        if filter_mode == "all":
+            groups = range(len(self.results))
+        else:
+            groups = self.results.type_groups[filter_mode.upper()]
+        
+        search = self.search_var.get().strip()
+        if search:
+            # Groups with at least one matching file that was not removed
+            if self.path_index is None:
+                self.path_index = PathIndex(self.results.paths)
+            matching = {self.results.group_of(slot) for slot in self.path_index.search(search)
+                        if self.results.paths[slot] is not None}
+            groups = sorted(g for g in matching if self.filter_matches(self.results.types[g]))
+        
+        rows = array('q')
+        exact_count = 0
+        similar_count = 0
+        for g in groups:
+            if self.results.is_shown(g):
+                rows.append(-1 - g)
+                rows.extend(self.results.file_slots(g))
+                if self.results.types[g] == "EXACT":
+                    exact_count += 1
+                else:
+                    similar_count += 1
+        return rows, exact_count, similar_count
+
+    def refresh_rows(self):
+        """Rebuild the rows, keeping the scroll position"""
+        self.view.set_rows(self.build_rows()[0], keep_position=True)
 
+    def row_key(self, row):
+        # Rows are in store order: a header sorts just before its first file
+        if row < 0:
+            return 2 * self.results.offsets[-1 - row]
+        return 2 * row + 1
 
+    def find_row(self, entry):
+        """Position of a row (file slot or -1 - g) in the list, or None"""
+        rows = self.view.rows
+        key = self.row_key(entry)
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.row_key(rows[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(rows) and rows[lo] == entry else None
+
+    def remove_deleted_files(self, slots):
+        """
+        Take deleted files out of the store, the list and the statistics
+        Only the affected groups are touched; a group with one file left
+        disappears with its header.
+        """
+        positions = []
+        by_group = {}
+        for slot in slots:
+            by_group.setdefault(self.results.group_of(slot), []).append(slot)
+        
+        for g, group_slots in by_group.items():
+            self.add_group_statistics(g, -1)
+            for slot in group_slots:
+                position = self.find_row(slot)
+                if position is not None:
+                    positions.append(position)
+                self.metadata.remove(self.results.paths[slot])
+                self.results.remove_file(slot)
+            if not self.results.is_shown(g):
+                for entry in [-1 - g] + self.results.file_slots(g):
+                    position = self.find_row(entry)
+                    if position is not None:
+                        positions.append(position)
+            self.add_group_statistics(g)
+        
+        self.view.remove_rows(positions)
+        self.show_statistics()
+
+    def file_size(self, file_path):
+        """Size of a file in bytes (0 if missing)"""
+        return self.metadata.size(file_path)
+
+    def format_row(self, row):
+        """Text, values and tags of one row of the result list"""
+        if row < 0:
+            g = -1 - row
+            group_type = self.results.types[g]
+            count = self.results.live_files[g]
+            if group_type == "EXACT":
+                label = f"🔴 Exact Duplicates #{self.group_numbers[g]} ({count} files)"
+                group_sim_display = "100%"
+            else:
+                avg_sim = sum(sim for _, sim in self.results.files(g)) / count
+                label = f"🟡 Similar Files #{self.group_numbers[g]} ({count} files) - Similarity: {avg_sim*100:.0f}%"
+                group_sim_display = f"{avg_sim*100:.0f}%"
+            return label, ("", "", group_sim_display), ('group',)
+
+        file_path = self.results.paths[row]
+        file_size = self.file_size(file_path)
+        size_str = f"{file_size / 1024:.1f} KB" if file_size > 0 else "N/A"
+        group_type = self.results.types[self.results.group_of(row)]
+        sim_str = f"{self.results.similarities[row]*100:.0f}%" if group_type == "SIMILAR" else "100%"
+        return f"  📄 {os.path.basename(file_path)}", (file_path, size_str, sim_str), ()
+
+    def insert_group(self, group_type, group_similarity, group):
+        """Add one group to the result store and, if it matches the filter, to the list"""
+        if len(group) < 2:
+            return
+        
+        g = self.results.add_group(group_type, group_similarity, group)
+        self.path_index = None  # rebuilt on the next search
+        if group_type == "EXACT":
+            self.exact_count += 1
+            self.group_numbers.append(self.exact_count)
+        else:
+            self.similar_count += 1
+            self.group_numbers.append(self.similar_count)
+        
+        search = self.search_var.get().strip()
+        if search and not PathIndex([p for p, _ in group]).search(search):
+            return
+        if self.filter_matches(group_type):
+            self.view.append_rows([-1 - g])
+            self.view.append_rows(self.results.file_slots(g))
 
     def display_results(self):
-        if not self.duplicate_groups:
+        """Summary once all groups are in the result list"""
+        self.report_quarantined()
+        if not len(self.results):
             messagebox.showinfo("No Duplicates", "No duplicate or similar files found!")
             self.status_var.set("No duplicates found")
             self.stats_var.set("No duplicates or similar files found")
             return
 
-        self.status_var.set("Displaying results...")
-        
-        exact_count = 0
-        similar_count = 0
-        self.group_items = {}
-
-        # Temporarily hide columns and clear tree for bulk insertion
-        self.tree.config(displaycolumns=())
-        self.tree.delete(*self.tree.get_children())
+        status_msg = f"✅ Found {self.exact_count} exact duplicate groups"
+        if self.similar_count > 0:
+            status_msg += f" and {self.similar_count} similar file groups"
+        self.status_var.set(status_msg)
 
-        for idx, (group_type, group_similarity, group) in enumerate(self.duplicate_groups):
-            if len(group) > 1:
-                if group_type == "EXACT":
-                    exact_count += 1
-                    label = f"🔴 Exact Duplicates #{exact_count} ({len(group)} files)"
-                    group_sim_display = "100%"
-                else:
-                    similar_count += 1
-                    avg_sim = sum(sim for _, sim in group) / len(group)
-                    label = f"🟡 Similar Files #{similar_count} ({len(group)} files) - Similarity: {avg_sim*100:.0f}%"
-                    group_sim_display = f"{avg_sim*100:.0f}%"
-
-                # Insert group header
-                group_item = self.tree.insert("", "end", text=label,
-                                            values=("", "", group_sim_display),
-                                            tags=('group',))
-                self.group_items[group_item] = (group_type, group_similarity, group)
-
-                # Insert all files under this group
-                for file_path, file_sim in group:
-                    filename = os.path.basename(file_path)
-                    directory = os.path.dirname(file_path)
-                    
-                    try:
-                        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                        size_str = f"{file_size / 1024:.1f} KB" if file_size > 0 else "N/A"
-                    except:
-                        size_str = "N/A"
-                    
-                    sim_str = f"{file_sim*100:.0f}%" if group_type == "SIMILAR" else "100%"
-                    
-                    file_item = self.tree.insert(group_item, "end",
-                                                text=f"  📄 {filename}",
-                                                values=(directory, size_str, sim_str))
-                    self.tree.set(file_item, "path", file_path)
-
-                self.tree.item(group_item, open=True)
-
-        # Restore columns and redraw once after all inserts
-        self.tree.config(displaycolumns=("path", "size", "similarity"))
-        self.tree.tag_configure('group', font=('TkDefaultFont', 10, 'bold'))
-        self.tree.update_idletasks()
+        # Sizes the backend did not print are read in the background
+        self.size_futures = self.metadata.prefetch(p for p in self.results.paths if p is not None)
+        if self.size_futures:
+            self.stats_var.set("Reading file sizes...")
+        self.wait_for_sizes(self.size_futures)
 
-        # Update statistics and status
-        self.update_statistics()
-        status_msg = f"✅ Found {exact_count} exact duplicate groups"
-        if similar_count > 0:
-            status_msg += f" and {similar_count} similar file groups"
-        self.status_var.set(status_msg)
+    def report_quarantined(self):
+        """Tell the user which Office files were skipped, their similarity is unknown"""
+        if not self.quarantined_files:
+            return
+        shown = "\n".join(f"• {path} ({reason})" if reason else f"• {path}"
+                          for path, reason in self.quarantined_files[:10])
+        if len(self.quarantined_files) > 10:
+            shown += f"\n... and {len(self.quarantined_files) - 10} more"
+        messagebox.showwarning(
+            "Files Not Compared",
+            f"{len(self.quarantined_files)} Office files were skipped because they hung or "
+            f"exhausted a loader before (office_quarantine.json):\n\n{shown}\n\n"
+            "Remove their entries from the quarantine list to try them again.")
 
+    def wait_for_sizes(self, futures):
+        """Update the statistics once the size prefetch is done"""
+        if futures is not self.size_futures:
+            return  # a new scan started
+        if all(future.done() for future in futures):
+            self.view.render()
+            self.update_statistics()
+        else:
+            self.root.after(100, self.wait_for_sizes, futures)
 
     def get_file_priority(self, file_path):
         """Calculate priority for file retention"""
@@ -676,11 +1208,8 @@ class DuplicateFinderGUI:
         
         keep_name = os.path.basename(keep_file[0])
         keep_dir = os.path.dirname(keep_file[0])
-        try:
-            keep_size = os.path.getsize(keep_file[0])
-            keep_size_str = f"{keep_size / 1024:.1f} KB"
-        except:
-            keep_size_str = "N/A"
+        keep_size = self.file_size(keep_file[0])
+        keep_size_str = f"{keep_size / 1024:.1f} KB" if keep_size > 0 else "N/A"
         
         ttk.Label(keep_frame, text=f"📄 {keep_name}", font=('TkDefaultFont', 10, 'bold')).pack(anchor=tk.W)
         ttk.Label(keep_frame, text=f"📁 {keep_dir}").pack(anchor=tk.W)
@@ -705,12 +1234,9 @@ class DuplicateFinderGUI:
         for file_path, _ in delete_files:
             filename = os.path.basename(file_path)
             directory = os.path.dirname(file_path)
-            try:
-                file_size = os.path.getsize(file_path)
-                size_str = f"{file_size / 1024:.1f} KB"
-                total_delete_size += file_size
-            except:
-                size_str = "N/A"
+            file_size = self.file_size(file_path)
+            size_str = f"{file_size / 1024:.1f} KB" if file_size > 0 else "N/A"
+            total_delete_size += file_size
             
             delete_list.insert(tk.END, f"📄 {filename} ({size_str}) - {directory}")
         
@@ -737,19 +1263,21 @@ class DuplicateFinderGUI:
     
     def delete_selected_group(self):
         """Delete all duplicates in the selected group"""
-        selection = self.tree.selection()
-        if not selection:
+        row = self.view.selected
+        if row is None:
             messagebox.showinfo("Info", "Please select a duplicate group to delete")
             return
         
-        selected_item = selection[0]
-        
         # Check if it's a group header
-        if selected_item not in self.group_items:
+        entry = self.view.rows[row]
+        if entry >= 0:
             messagebox.showinfo("Info", "Please select a group header (not a single file)")
             return
         
-        group_type, group_similarity, group = self.group_items[selected_item]
+        g = -1 - entry
+        group_type = self.results.types[g]
+        group = self.results.files(g)
+        slots = {self.results.paths[slot]: slot for slot in self.results.file_slots(g)}
         
         if group_type != "EXACT":
             confirm = messagebox.askyesno(
@@ -779,101 +1307,47 @@ class DuplicateFinderGUI:
         if not confirm:
             return
         
-        deleted_count = 0
-        errors = []
-        
-        for file_path, _ in delete_files:
-            try:
-                os.remove(file_path)
-                deleted_count += 1
-            except Exception as e:
-                errors.append(f"{os.path.basename(file_path)}: {e}")
-        
-        if errors:
-            messagebox.showwarning("Deletion Complete with Errors", 
-                                 f"Deleted {deleted_count} files\n\nErrors:\n" + "\n".join(errors[:3]))
-        else:
-            messagebox.showinfo("Success", f"Deleted {deleted_count} files from group")
-        
-        # Remove group from tree
-        self.tree.delete(selected_item)
-        del self.group_items[selected_item]
-        
-        # Update statistics
-        self.update_statistics()
-    
+        self.start_deletion({file_path: slots[file_path] for file_path, _ in delete_files})
+
     def delete_all_duplicates(self):
         """Delete all exact duplicate files, keeping one per group"""
-        if not self.duplicate_groups:
+        if not len(self.results):
             messagebox.showinfo("Info", "No duplicates to delete")
             return
 
-        total_to_delete = 0
-        files_to_delete = []
+        files_to_delete = {}  # path -> slot
         keep_decisions = []
         total_space_to_free = 0
 
-        # Precompute file sizes to avoid repeated os.path.getsize calls
-        file_sizes = {}
-        for group_type, _, group in self.duplicate_groups:
-            for file_path, _ in group:
-                if file_path not in file_sizes:
-                    try:
-                        file_sizes[file_path] = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                    except:
-                        file_sizes[file_path] = 0
-
         # Iterate over duplicate groups
-        for group_type, _, group in self.duplicate_groups:
-            if group_type == "EXACT" and len(group) > 1:
+        for g in range(len(self.results)):
+            if self.results.types[g] == "EXACT" and self.results.is_shown(g):
                 # Sort files by priority (e.g., modification date, folder preference)
-                sorted_group = sorted(group, key=lambda x: self.get_file_priority(x[0]))
+                sorted_slots = sorted(self.results.file_slots(g),
+                                      key=lambda slot: self.get_file_priority(self.results.paths[slot]))
 
                 # Keep the first file, delete the rest
-                keep_file = sorted_group[0]
-                delete_files = sorted_group[1:]
+                keep_file = self.results.paths[sorted_slots[0]]
 
                 keep_decisions.append(
-                    f"✓ Keep: {os.path.basename(keep_file[0])} ({os.path.dirname(keep_file[0])})"
+                    f"✓ Keep: {os.path.basename(keep_file)} ({os.path.dirname(keep_file)})"
                 )
 
                 # Collect files to delete and calculate total space
-                for file_path, _ in delete_files:
-                    files_to_delete.append(file_path)
-                    total_to_delete += 1
-                    total_space_to_free += file_sizes.get(file_path, 0)
-
-
-        # Optional: Update GUI once after collecting all files
-        self.status_var.set(f"Preparing to delete {total_to_delete} files...")
+                for slot in sorted_slots[1:]:
+                    file_path = self.results.paths[slot]
+                    files_to_delete[file_path] = slot
+                    total_space_to_free += self.file_size(file_path)
 
+        total_to_delete = len(files_to_delete)
         if total_to_delete == 0:
             messagebox.showinfo("Info", "No exact duplicates to delete")
             return
 
-        # Precompute file sizes to avoid repeated os.path.getsize calls
-        file_sizes = {}
-        for file_path in files_to_delete:
-            if file_path not in file_sizes:
-                try:
-                    file_sizes[file_path] = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                except:
-                    file_sizes[file_path] = 0
-
-        total_space_to_free = sum(file_sizes.values())
-
-        # Format space for display
-        if total_space_to_free > 1024**3:  # > 1 GB
-            space_str = f"{total_space_to_free / (1024**3):.2f} GB"
-        elif total_space_to_free > 1024**2:  # > 1 MB
-            space_str = f"{total_space_to_free / (1024**2):.2f} MB"
-        else:
-            space_str = f"{total_space_to_free / 1024:.2f} KB"
-
         # Build confirmation text
         confirmation_text = (
             f"This will permanently delete {total_to_delete} EXACT duplicate files.\n"
-            f"💾 Space to free: {space_str}\n\n"
+            f"💾 Space to free: {format_space(total_space_to_free)}\n\n"
             "Keeping decisions:\n" + "\n".join(keep_decisions[:5])
         )
         if len(keep_decisions) > 5:
@@ -885,18 +1359,73 @@ class DuplicateFinderGUI:
         if not confirm:
             return
 
-        # Delete files
-        deleted_count = 0
-        errors = []
-        for file_path in files_to_delete:
+        self.start_deletion(files_to_delete)
+
+    def start_deletion(self, files_to_delete):
+        """Delete files (path -> slot) in the background"""
+        if self.deletion:
+            messagebox.showinfo("Info", "A deletion is already running")
+            return
+        
+        self.deletion = DeletionJob(list(files_to_delete))
+        self.deletion_slots = files_to_delete
+        self.deletion_errors = []
+        self.deleted_count = 0
+        self.freed_space = 0
+        
+        self.update_buttons()
+        self.progress_frame.pack(fill=tk.X, pady=5)
+        self.progress_bar['value'] = 0
+        self.process_deletion(self.deletion)
+
+    def process_deletion(self, job):
+        """Apply finished removals to the list and statistics, like process_queues for the scan"""
+        if job is not self.deletion:
+            return  # results were cleared
+        
+        finished = job.done()  # before draining, so no removal is missed
+        deleted = []
+        while True:
             try:
-                os.remove(file_path)
-                deleted_count += 1
-            except Exception as e:
-                errors.append(f"{os.path.basename(file_path)}: {e}")
+                file_path, error = job.queue.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                self.freed_space += self.file_size(file_path)
+                deleted.append(self.deletion_slots[file_path])
+            else:
+                self.deletion_errors.append(f"{os.path.basename(file_path)}: {error}")
+        
+        if deleted:
+            self.deleted_count += len(deleted)
+            self.remove_deleted_files(deleted)
+        
+        done = self.deleted_count + len(self.deletion_errors)
+        elapsed = max(time.time() - job.start_time, 1e-6)
+        self.progress_bar['value'] = 100 * done / job.total
+        self.status_var.set(f"🗑️ Deleting {done}/{job.total} files ({done / elapsed:.0f} files/s) "
+                            f"| 💾 {format_space(self.freed_space)} freed")
+        
+        if finished:
+            self.deletion_complete(job)
+        else:
+            self.root.after(100, self.process_deletion, job)
 
+    def deletion_complete(self, job):
+        self.deletion = None
+        if not self.scanning:
+            self.progress_frame.pack_forget()
+        self.update_buttons()
+        
+        deleted_count = self.deleted_count
+        errors = self.deletion_errors
+        space_str = format_space(self.freed_space)
+        
         # Show results
-        if errors:
+        if job.cancelled.is_set() and deleted_count + len(errors) < job.total:
+            messagebox.showinfo("Deletion Cancelled",
+                                f"Deleted {deleted_count} of {job.total} files before cancelling\n💾 Freed up: {space_str}")
+        elif errors:
             error_msg = f"✅ Deleted {deleted_count} files\n\n⚠️ Errors:\n\n" + "\n".join(errors[:5])
             if len(errors) > 5:
                 error_msg += f"\n\n... and {len(errors) - 5} more errors"
@@ -905,17 +1434,24 @@ class DuplicateFinderGUI:
             messagebox.showinfo("✅ Deletion Complete",
                                 f"Successfully deleted {deleted_count} files!\n💾 Freed up: {space_str}")
 
-        # Update status and refresh duplicates
         self.status_var.set(f"Deleted {deleted_count} files, freed {space_str}")
-        self.scan_duplicates()
-
 
-    
     def clear_results(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.duplicate_groups = []
-        self.group_items = {}
+        if self.deletion:
+            self.deletion.cancel()
+            self.deletion_complete(self.deletion)
+        self.results = ResultStore()
+        self.group_numbers = array('l')
+        self.metadata = FileMetadata()
+        self.size_futures = []
+        self.view.set_rows(array('q'))
+        self.current_group = []
+        self.current_group_type = "EXACT"
+        self.current_group_similarity = 1.0
+        self.pending_groups = []
+        self.exact_count = 0
+        self.similar_count = 0
+        self.path_index = None
         self.status_var.set("Results cleared")
         self.stats_var.set("No scan performed yet")
 
@@ -13,10 +13,21 @@
 #include <ctime>
 #include <locale>
 #include <unordered_map>
+#include <unordered_set>
+#include <functional>
+#include <array>
 
 #ifdef _WIN32
     #include <windows.h>
     #include <wincrypt.h>
+#else
+    #include <unistd.h>
+    #include <sys/wait.h>
+    #include <sys/mman.h>
+    #include <sys/stat.h>
+    #include <fcntl.h>
+    #include <csignal>
+    #include <cerrno>
 #endif
 
 // stb_image for image loading
@@ -53,68 +64,58 @@ struct FileInfo {
 // ---------------------------------------------------------
 class SimilarityFinder {
 public:
+    // Plain-text files are compared by their first lines (same default as the comparer)
+    static constexpr int DEFAULT_TEXT_LINES = 50;
+    int textLines = DEFAULT_TEXT_LINES;
+
     // Structs for batch processing
-    struct ComparisonPair {
+    // Office (or plain-text) files of one type - the comparer compares every pair in a group
+    struct OfficeGroup {
         std::string type;
-        std::string file1;
-        std::string file2;
-        size_t index;
+        std::vector<size_t> ids;          // indices into the scanned file list
+        std::vector<std::string> paths;
     };
     
     struct ComparisonResult {
         bool similar;
         double score;
     };
+    
+    // Similar pairs keyed by (id1, id2); finished = every pair was compared,
+    // so a pair that is missing is not similar
+    struct BatchResults {
+        std::map<std::pair<size_t, size_t>, ComparisonResult> similar;
+        bool finished = false;
+    };
 
     // ================== BATCH PROCESSING ==================
-    std::map<size_t, ComparisonResult> compareOfficeFilesBatch(
-        const std::vector<ComparisonPair>& comparisons) {
-        
-        if (comparisons.empty()) return {};
-        
-        // Build JSON input
-        std::stringstream jsonInput;
-        jsonInput << "[";
-        for (size_t i = 0; i < comparisons.size(); i++) {
-            if (i > 0) jsonInput << ",";
-            jsonInput << "{\"type\":\"" << comparisons[i].type << "\","
-                     << "\"file1\":\"" << escapeJsonString(comparisons[i].file1) << "\","
-                     << "\"file2\":\"" << escapeJsonString(comparisons[i].file2) << "\"}";
-        }
-        jsonInput << "]";
-        
-        std::string inputFile = "temp_input_" + std::to_string(std::time(nullptr)) + ".json";
-        std::string outputFile = "temp_output_" + std::to_string(std::time(nullptr)) + ".json";
-        
-        std::ofstream outf(inputFile);
-        outf << jsonInput.str();
-        outf.close();
-        
-        std::string currentDir = fs::current_path().string();
+    BatchResults compareOfficeGroups(const std::vector<OfficeGroup>& groups) {
+        BatchResults results;
+        if (groups.empty()) return results;
         
-        #ifdef _WIN32
-            std::string command = "cd /d \"" + currentDir + "\" && python office_comparer_batch.py < \"" 
-                                  + inputFile + "\" > \"" + outputFile + "\"";
-        #else
-            std::string command = "cd \"" + currentDir + "\" && python3 office_comparer_batch.py < \"" 
-                                  + inputFile + "\" > \"" + outputFile + "\"";
-        #endif
-        
-        int result = system(command.c_str());
-        
-        std::map<size_t, ComparisonResult> results;
-        if (result == 0) {
-            std::ifstream inf(outputFile);
-            std::stringstream buffer;
-            buffer << inf.rdbuf();
-            std::string jsonOutput = buffer.str();
-            inf.close();
-            
-            results = parseJsonResults(jsonOutput, comparisons);
+        // Compact "groups" input: every file once, the comparer forms the pairs
+        std::ostringstream input;
+        size_t totalPairs = 0;
+        input << "{\"groups\":[";
+        for (size_t g = 0; g < groups.size(); g++) {
+            if (g > 0) input << ",";
+            input << "{\"type\":\"" << groups[g].type << "\",\"files\":[";
+            for (size_t k = 0; k < groups[g].paths.size(); k++) {
+                if (k > 0) input << ",";
+                input << "{\"id\":" << groups[g].ids[k] 
+                      << ",\"path\":\"" << escapeJsonString(groups[g].paths[k]) << "\"}";
+            }
+            input << "]}";
+            size_t n = groups[g].paths.size();
+            totalPairs += n * (n - 1) / 2;
         }
+        input << "]}\n";
         
-        std::remove(inputFile.c_str());
-        std::remove(outputFile.c_str());
+        // Results arrive one per line, progress records are merged in from
+        // stderr so we can report them while Python is working
+        runComparer(input.str(), [&](const std::string& line) {
+            handleBatchOutputLine(line, totalPairs, results);
+        });
         return results;
     }
 
@@ -262,7 +263,7 @@ public:
         if (!fs) return "";
         std::string content, line;
         int lineCount = 0;
-        while (std::getline(fs, line) && lineCount < 50) {
+        while (std::getline(fs, line) && lineCount < textLines) {
             content += line + "\n";
             lineCount++;
         }
@@ -293,26 +294,43 @@ public:
         return total > 0 ? (double)common / total : 0.0;
     }
 
-    std::pair<bool, double> areDocumentsSimilar(const ::FileInfo& doc1, const ::FileInfo& doc2) {
+    // Size and name checks; returns true if they already decide the pair
+    bool documentPrecheck(const ::FileInfo& doc1, const ::FileInfo& doc2, std::pair<bool, double>& result) {
         double sizeRatio = (double)std::min(doc1.size_bytes, doc2.size_bytes) 
                          / std::max(doc1.size_bytes, doc2.size_bytes);
-        if (sizeRatio < 0.3) return {false, 0.0};
+        if (sizeRatio < 0.3) { result = {false, 0.0}; return true; }
 
         std::string name1 = fs::path(doc1.path).stem().string();
         std::string name2 = fs::path(doc2.path).stem().string();
         double nameSim = calculateStringSimilarity(name1, name2);
-        if (nameSim > 0.7) return {true, nameSim};
+        if (nameSim > 0.7) { result = {true, nameSim}; return true; }
 
-        if (doc1.path.find(".txt") != std::string::npos ||
-            doc1.path.find(".csv") != std::string::npos ||
-            doc1.path.find(".pdf") != std::string::npos) {
-            std::string content1 = extractTextContent(doc1);
-            std::string content2 = extractTextContent(doc2);
-            double textSim = calculateTextSimilarity(content1, content2);
-            return {textSim > 0.6, textSim};
-        }
+        result = {false, 0.0};
+        return !(doc1.path.find(".txt") != std::string::npos ||
+                 doc1.path.find(".csv") != std::string::npos ||
+                 doc1.path.find(".pdf") != std::string::npos);
+    }
 
-        return {false, 0.0};
+    std::pair<bool, double> areDocumentsSimilar(const ::FileInfo& doc1, const ::FileInfo& doc2) {
+        std::pair<bool, double> result;
+        if (documentPrecheck(doc1, doc2, result)) return result;
+
+        std::string content1 = extractTextContent(doc1);
+        std::string content2 = extractTextContent(doc2);
+        double textSim = calculateTextSimilarity(content1, content2);
+        return {textSim > 0.6, textSim};
+    }
+
+    // Same, with the content similarity taken from the batch comparer
+    // (it reports every similar pair of a finished "text" group)
+    std::pair<bool, double> areDocumentsSimilar(const ::FileInfo& doc1, const ::FileInfo& doc2,
+                                                const BatchResults& batch, size_t id1, size_t id2) {
+        std::pair<bool, double> result;
+        if (documentPrecheck(doc1, doc2, result)) return result;
+
+        auto it = batch.similar.find({id1, id2});
+        if (it == batch.similar.end()) return {false, 0.0};
+        return {it->second.similar, it->second.score};
     }
 
     // ================== ARCHIVE COMPARISON ==================
@@ -372,42 +390,387 @@ private:
         return escaped;
     }
 
-    std::map<size_t, ComparisonResult> parseJsonResults(
-        const std::string& json, 
-        const std::vector<ComparisonPair>& comparisons) {
+    // Returns the raw text of a top-level JSON value in a single-line object
+    std::string findJsonValue(const std::string& json, const std::string& key) {
+        size_t keyPos = json.find("\"" + key + "\"");
+        if (keyPos == std::string::npos) return "";
+        size_t colonPos = json.find(":", keyPos);
+        if (colonPos == std::string::npos) return "";
+        size_t valueStart = colonPos + 1;
+        while (valueStart < json.length() && (json[valueStart] == ' ' || json[valueStart] == '\t')) valueStart++;
+        size_t endPos = json.find_first_of(",}", valueStart);
+        if (endPos == std::string::npos) endPos = json.length();
+        return json.substr(valueStart, endPos - valueStart);
+    }
+
+    // One line of comparer output: a similar pair, a progress record or a message
+    void handleBatchOutputLine(std::string line, size_t totalPairs, BatchResults& results) {
+        while (!line.empty() && (line.back() == '\n' || line.back() == '\r')) line.pop_back();
+        if (line.empty()) return;
         
-        std::map<size_t, ComparisonResult> results;
-        size_t pos = 0, compIndex = 0;
-        while ((pos = json.find("\"similar\"", pos)) != std::string::npos &&
-               compIndex < comparisons.size()) {
-            
+        if (line.rfind("{\"id1\"", 0) == 0) {
+            size_t id1, id2;
             ComparisonResult result;
-            size_t colonPos = json.find(":", pos);
-            if (colonPos == std::string::npos) break;
-            size_t valueStart = colonPos + 1;
-            while (valueStart < json.length() && (json[valueStart] == ' ' || json[valueStart] == '\t')) valueStart++;
-            if (json.substr(valueStart, 4) == "true") result.similar = true;
-            else result.similar = false;
-
-            size_t scorePos = json.find("\"score\"", pos);
-            if (scorePos != std::string::npos && scorePos < json.find("}", pos)) {
-                colonPos = json.find(":", scorePos);
-                if (colonPos != std::string::npos) {
-                    valueStart = colonPos + 1;
-                    while (valueStart < json.length() && (json[valueStart] == ' ' || json[valueStart] == '\t')) valueStart++;
-                    size_t endPos = json.find_first_of(",}", valueStart);
-                    std::string scoreStr = json.substr(valueStart, endPos - valueStart);
-                    try { result.score = std::stod(scoreStr); } catch(...) { result.score = 0.0; }
+            try {
+                id1 = std::stoul(findJsonValue(line, "id1"));
+                id2 = std::stoul(findJsonValue(line, "id2"));
+            } catch(...) { return; }
+            
+            result.similar = findJsonValue(line, "similar") == "true";
+            try { result.score = std::stod(findJsonValue(line, "score")); } catch(...) { result.score = 0.0; }
+            
+            results.similar[{id1, id2}] = result;
+        } else if (line.rfind("{\"progress\"", 0) == 0) {
+            // Same format the GUI already parses for progress updates
+            std::string done = findJsonValue(line, "progress");
+            if (!done.empty())
+                std::cerr << "Processed " << done << "/" << totalPairs 
+                          << " comparisons" << std::endl;
+            if (findJsonValue(line, "finished") == "true") results.finished = true;
+        } else {
+            std::cerr << line << std::endl;
+        }
+    }
+    
+    // Hands complete lines to onLine and keeps the unfinished rest in pending
+    static void splitLines(std::string& pending, const std::function<void(const std::string&)>& onLine) {
+        size_t start = 0, end;
+        while ((end = pending.find('\n', start)) != std::string::npos) {
+            onLine(pending.substr(start, end - start));
+            start = end + 1;
+        }
+        pending.erase(0, start);
+    }
+    
+    // Runs office_comparer_batch.py with input on its stdin (a pipe, no temp
+    // file) and calls onLine for every line of its merged stdout/stderr.
+    // The comparer reads all of its input before it writes anything, so the
+    // input is written first and the output read afterwards.
+    bool runComparer(const std::string& input, const std::function<void(const std::string&)>& onLine) {
+        std::string pending;
+        char buffer[4096];
+    #ifdef _WIN32
+        SECURITY_ATTRIBUTES sa = { sizeof(SECURITY_ATTRIBUTES), NULL, TRUE };
+        HANDLE inRead, inWrite, outRead, outWrite;
+        if (!CreatePipe(&inRead, &inWrite, &sa, 0)) return false;
+        if (!CreatePipe(&outRead, &outWrite, &sa, 0)) {
+            CloseHandle(inRead); CloseHandle(inWrite);
+            return false;
+        }
+        // Our ends must not be inherited, or the comparer never sees EOF
+        SetHandleInformation(inWrite, HANDLE_FLAG_INHERIT, 0);
+        SetHandleInformation(outRead, HANDLE_FLAG_INHERIT, 0);
+        
+        STARTUPINFOA si = {};
+        si.cb = sizeof(si);
+        si.dwFlags = STARTF_USESTDHANDLES;
+        si.hStdInput = inRead;
+        si.hStdOutput = outWrite;
+        si.hStdError = outWrite;
+        PROCESS_INFORMATION pi = {};
+        std::string command = "python office_comparer_batch.py --text-lines " + std::to_string(textLines);
+        BOOL started = CreateProcessA(NULL, &command[0], NULL, NULL, TRUE, 0, NULL, NULL, &si, &pi);
+        CloseHandle(inRead);
+        CloseHandle(outWrite);
+        if (!started) {
+            CloseHandle(inWrite); CloseHandle(outRead);
+            return false;
+        }
+        
+        size_t offset = 0;
+        DWORD written = 0;
+        while (offset < input.size()) {
+            DWORD chunk = (DWORD)std::min<size_t>(input.size() - offset, 1 << 16);
+            if (!WriteFile(inWrite, input.data() + offset, chunk, &written, NULL)) break;
+            offset += written;
+        }
+        CloseHandle(inWrite);
+        
+        DWORD bytesRead = 0;
+        while (ReadFile(outRead, buffer, sizeof(buffer), &bytesRead, NULL) && bytesRead > 0) {
+            pending.append(buffer, bytesRead);
+            splitLines(pending, onLine);
+        }
+        CloseHandle(outRead);
+        WaitForSingleObject(pi.hProcess, INFINITE);
+        CloseHandle(pi.hProcess);
+        CloseHandle(pi.hThread);
+    #else
+        std::string textLinesArg = std::to_string(textLines);
+        int inPipe[2], outPipe[2];
+        if (pipe(inPipe) != 0) return false;
+        if (pipe(outPipe) != 0) {
+            close(inPipe[0]); close(inPipe[1]);
+            return false;
+        }
+        
+        pid_t pid = fork();
+        if (pid < 0) {
+            close(inPipe[0]); close(inPipe[1]); close(outPipe[0]); close(outPipe[1]);
+            return false;
+        }
+        if (pid == 0) {
+            dup2(inPipe[0], STDIN_FILENO);
+            dup2(outPipe[1], STDOUT_FILENO);
+            dup2(outPipe[1], STDERR_FILENO);
+            close(inPipe[0]); close(inPipe[1]); close(outPipe[0]); close(outPipe[1]);
+            execlp("python3", "python3", "office_comparer_batch.py",
+                   "--text-lines", textLinesArg.c_str(), (char*)nullptr);
+            _exit(127);
+        }
+        close(inPipe[0]);
+        close(outPipe[1]);
+        
+        // A comparer that exits early must not kill us with SIGPIPE; only
+        // while writing to it, our own stdout keeps the previous handler
+        auto previousSigpipe = signal(SIGPIPE, SIG_IGN);
+        size_t offset = 0;
+        while (offset < input.size()) {
+            ssize_t n = write(inPipe[1], input.data() + offset, input.size() - offset);
+            if (n < 0 && errno == EINTR) continue;
+            if (n <= 0) break;
+            offset += n;
+        }
+        close(inPipe[1]);
+        signal(SIGPIPE, previousSigpipe);
+        
+        ssize_t n;
+        while ((n = read(outPipe[0], buffer, sizeof(buffer))) != 0) {
+            if (n < 0 && errno == EINTR) continue;
+            if (n < 0) break;
+            pending.append(buffer, n);
+            splitLines(pending, onLine);
+        }
+        close(outPipe[0]);
+        waitpid(pid, nullptr, 0);
+    #endif
+        if (!pending.empty()) onLine(pending);
+        return true;
+    }
+};
+
+// ---------------------------------------------------------
+// MappedFile class - read-only memory mapping, one window at a time
+// ---------------------------------------------------------
+class MappedFile {
+public:
+    // Multiple of the page size and of the Windows allocation granularity
+    static constexpr uint64_t WINDOW = 64ull * 1024 * 1024;
+
+    explicit MappedFile(const std::string& path) {
+    #ifdef _WIN32
+        file = CreateFileA(path.c_str(), GENERIC_READ, FILE_SHARE_READ | FILE_SHARE_WRITE, NULL,
+                           OPEN_EXISTING, FILE_FLAG_SEQUENTIAL_SCAN, NULL);
+        if (file == INVALID_HANDLE_VALUE) return;
+        LARGE_INTEGER size;
+        if (!GetFileSizeEx(file, &size)) return;
+        fileSize = (uint64_t)size.QuadPart;
+        if (fileSize > 0) mapping = CreateFileMappingA(file, NULL, PAGE_READONLY, 0, 0, NULL);
+    #else
+        fd = open(path.c_str(), O_RDONLY);
+        if (fd < 0) return;
+        struct stat st;
+        if (fstat(fd, &st) != 0) return;
+        fileSize = (uint64_t)st.st_size;
+    #endif
+        opened = true;
+    }
+
+    ~MappedFile() {
+        unmap();
+    #ifdef _WIN32
+        if (mapping != NULL) CloseHandle(mapping);
+        if (file != INVALID_HANDLE_VALUE) CloseHandle(file);
+    #else
+        if (fd >= 0) close(fd);
+    #endif
+    }
+
+    MappedFile(const MappedFile&) = delete;
+    MappedFile& operator=(const MappedFile&) = delete;
+
+    bool isOpen() const { return opened; }
+    uint64_t size() const { return fileSize; }
+
+    // Maps [offset, offset + length) and unmaps the previous window;
+    // offset must be a multiple of WINDOW. Returns nullptr on failure
+    const unsigned char* map(uint64_t offset, size_t length) {
+        unmap();
+        if (!opened || length == 0) return nullptr;
+    #ifdef _WIN32
+        if (mapping == NULL) return nullptr;
+        view = MapViewOfFile(mapping, FILE_MAP_READ, (DWORD)(offset >> 32), (DWORD)(offset & 0xFFFFFFFF), length);
+        if (view == NULL) return nullptr;
+    #else
+        void* address = mmap(nullptr, length, PROT_READ, MAP_PRIVATE, fd, (off_t)offset);
+        if (address == MAP_FAILED) return nullptr;
+        madvise(address, length, MADV_SEQUENTIAL);
+        view = address;
+    #endif
+        viewLength = length;
+        return static_cast<const unsigned char*>(view);
+    }
+
+private:
+    void unmap() {
+        if (view == nullptr) return;
+    #ifdef _WIN32
+        UnmapViewOfFile(view);
+    #else
+        munmap(view, viewLength);
+    #endif
+        view = nullptr;
+    }
+
+    bool opened = false;
+    uint64_t fileSize = 0;
+    void* view = nullptr;
+    size_t viewLength = 0;
+#ifdef _WIN32
+    HANDLE file = INVALID_HANDLE_VALUE;
+    HANDLE mapping = NULL;
+#else
+    int fd = -1;
+#endif
+};
+
+// ---------------------------------------------------------
+// ChunkIndex class - content-defined chunking of large files
+// ---------------------------------------------------------
+// Files are cut where a rolling (gear) hash over the last 64 bytes hits
+// a pattern, so an insertion or appended data only changes the chunks
+// around it and the others keep their hash. Two files that share chunks
+// share that content, wherever it is in the file.
+struct OverlapPair {
+    size_t file1, file2;       // ids passed to addFile
+    double ratio;              // shared bytes / chunked bytes of the smaller file
+    uint64_t sharedBytes;      // stored twice, could be reclaimed
+};
+
+class ChunkIndex {
+public:
+    static constexpr size_t MIN_CHUNK = 2 * 1024;
+    static constexpr size_t MAX_CHUNK = 64 * 1024;
+    static constexpr int AVG_CHUNK_BITS = 13;            // 8 KiB average chunk
+    static constexpr size_t MAX_FILES_PER_CHUNK = 64;    // chunks in more files are boilerplate
+
+    // Splits a file into chunks and adds them to the index (one pass over
+    // the mapped file); false if it can't be read
+    bool addFile(size_t id, const std::string& path) {
+        MappedFile file(path);
+        if (!file.isOpen()) return false;
+
+        const std::array<uint64_t, 256>& gear = gearTable();
+        std::vector<std::pair<uint64_t, uint32_t>> fileChunks;  // (hash, size)
+        uint64_t rolling = 0, hash = FNV_OFFSET;
+        size_t chunkSize = 0;
+
+        for (uint64_t offset = 0; offset < file.size(); offset += MappedFile::WINDOW) {
+            size_t length = (size_t)std::min<uint64_t>(MappedFile::WINDOW, file.size() - offset);
+            const unsigned char* data = file.map(offset, length);
+            if (data == nullptr) return false;
+
+            for (size_t i = 0; i < length; i++) {
+                rolling = (rolling << 1) + gear[data[i]];
+                hash = (hash ^ data[i]) * FNV_PRIME;
+                chunkSize++;
+                // Top bits only depend on the last 64 bytes
+                if ((chunkSize >= MIN_CHUNK && (rolling >> (64 - AVG_CHUNK_BITS)) == 0)
+                    || chunkSize >= MAX_CHUNK) {
+                    fileChunks.push_back({hash, (uint32_t)chunkSize});
+                    rolling = 0;
+                    hash = FNV_OFFSET;
+                    chunkSize = 0;
                 }
-            } else result.score = 0.0;
+            }
+        }
+        if (chunkSize > 0) fileChunks.push_back({hash, (uint32_t)chunkSize});
+
+        // Each distinct chunk counts once per file (repeated headers, padding)
+        uint64_t distinctBytes = 0;
+        std::unordered_set<uint64_t> seen;
+        seen.reserve(fileChunks.size());
+        for (const auto& [chunkHash, size] : fileChunks) {
+            if (!seen.insert(chunkHash).second) continue;  // repeated in this file
+            Chunk& chunk = chunks[chunkHash];
+            chunk.size = size;
+            distinctBytes += size;
+            if (chunk.common) continue;
+            if (chunk.files.size() >= MAX_FILES_PER_CHUNK) {
+                chunk.common = true;
+                chunk.files.clear();
+                chunk.files.shrink_to_fit();
+                commonChunks++;
+                continue;
+            }
+            chunk.files.push_back(id);
+        }
+        fileBytes[id] = distinctBytes;
+        bytesScanned += file.size();
+        return true;
+    }
 
-            size_t resultIndex = comparisons[compIndex].index;
-            results[resultIndex] = result;
-            compIndex++;
-            pos = json.find("}", pos) + 1;
+    // Pairs whose shared chunks make up at least threshold of the smaller
+    // file, most reclaimable bytes first. Chunks that are in more than
+    // MAX_FILES_PER_CHUNK files are not counted, so the work stays linear
+    // in the number of chunks
+    std::vector<OverlapPair> findPairs(double threshold) const {
+        // Shared bytes per pair, keyed by (id1 << 32 | id2); ids are added in order
+        std::unordered_map<uint64_t, uint64_t> shared;
+        for (const auto& [chunkHash, chunk] : chunks) {
+            for (size_t a = 0; a < chunk.files.size(); a++)
+                for (size_t b = a + 1; b < chunk.files.size(); b++)
+                    shared[((uint64_t)chunk.files[a] << 32) | chunk.files[b]] += chunk.size;
         }
-        return results;
+
+        std::vector<OverlapPair> pairs;
+        for (const auto& [key, bytes] : shared) {
+            size_t id1 = (size_t)(key >> 32), id2 = (size_t)(key & 0xFFFFFFFF);
+            uint64_t smaller = std::min(fileBytes.at(id1), fileBytes.at(id2));
+            double ratio = smaller > 0 ? (double)bytes / smaller : 0.0;
+            if (ratio >= threshold) pairs.push_back({id1, id2, ratio, bytes});
+        }
+        std::sort(pairs.begin(), pairs.end(), [](const OverlapPair& x, const OverlapPair& y) {
+            if (x.sharedBytes != y.sharedBytes) return x.sharedBytes > y.sharedBytes;
+            return std::make_pair(x.file1, x.file2) < std::make_pair(y.file1, y.file2);
+        });
+        return pairs;
+    }
+
+    size_t chunkCount() const { return chunks.size(); }
+    size_t commonChunkCount() const { return commonChunks; }
+    uint64_t scannedBytes() const { return bytesScanned; }
+
+private:
+    static constexpr uint64_t FNV_OFFSET = 14695981039346656037ull;
+    static constexpr uint64_t FNV_PRIME = 1099511628211ull;
+
+    struct Chunk {
+        uint32_t size = 0;
+        bool common = false;
+        std::vector<size_t> files;
+    };
+
+    // Fixed pseudo-random value per byte (splitmix64), same on every run
+    static const std::array<uint64_t, 256>& gearTable() {
+        static const std::array<uint64_t, 256> table = [] {
+            std::array<uint64_t, 256> values{};
+            uint64_t state = 0x9E3779B97F4A7C15ull;
+            for (auto& value : values) {
+                uint64_t z = (state += 0x9E3779B97F4A7C15ull);
+                z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ull;
+                z = (z ^ (z >> 27)) * 0x94D049BB133111EBull;
+                value = z ^ (z >> 31);
+            }
+            return values;
+        }();
+        return table;
     }
+
+    std::unordered_map<uint64_t, Chunk> chunks;
+    std::unordered_map<size_t, uint64_t> fileBytes;   // distinct chunked bytes per file
+    size_t commonChunks = 0;
+    uint64_t bytesScanned = 0;
 };
 
 // ---------------------------------------------------------
@@ -418,10 +781,15 @@ private:
     SimilarityFinder similarityFinder;
 
 public:
+    // Files smaller than this are not chunked (a few chunks say little)
+    static constexpr uint64_t MIN_OVERLAP_FILE_SIZE = 1024 * 1024;
+
+    void setTextLines(int lines) { similarityFinder.textLines = lines; }
     std::vector<FileInfo> findFiles(const std::string& directory);
     std::string calculateHash(const std::string& filePath);
     std::map<std::string, std::vector<FileInfo>> findExactDuplicates(const std::vector<FileInfo>& files);
     std::vector<std::vector<FileInfo>> findSimilarFiles(const std::vector<FileInfo>& files);
+    std::vector<OverlapPair> findOverlappingFiles(const std::vector<FileInfo>& files, double threshold);
 };
 
 
@@ -591,35 +959,28 @@ std::vector<std::vector<FileInfo>> FileScanner::findSimilarFiles(const std::vect
     }
     
     
-    // ========== STEP 1: Collect all Office file comparisons ==========
-    std::vector<SimilarityFinder::ComparisonPair> officeComparisons;
-    std::map<std::pair<size_t, size_t>, size_t> comparisonIndexMap;
+    // ========== STEP 1: Group Office and plain-text files by type (each file sent once) ==========
+    std::vector<SimilarityFinder::OfficeGroup> officeGroups;
+    std::map<std::string, size_t> groupOfType;
     
     for (size_t i = 0; i < files.size(); i++) {
-        if (processed[i]) continue;
+        const std::string& type = files[i].type;
+        if (type != "word" && type != "excel" && type != "powerpoint" && type != "text") continue;
+        if (filesPerType[type] < 2) continue;  // nothing to compare with
         
-        for (size_t j = i + 1; j < files.size(); j++) {
-            if (processed[j] || files[i].type != files[j].type) continue;
-            
-            // Collect Office file comparisons for batch processing
-            if (files[i].type == "word" || files[i].type == "excel" || files[i].type == "powerpoint") {
-                SimilarityFinder::ComparisonPair pair;
-                pair.type = files[i].type;
-                pair.file1 = files[i].path;
-                pair.file2 = files[j].path;
-                pair.index = officeComparisons.size();
-               
-                
-                comparisonIndexMap[{i, j}] = pair.index;
-                officeComparisons.push_back(pair);
-            }
+        auto it = groupOfType.find(type);
+        if (it == groupOfType.end()) {
+            it = groupOfType.emplace(type, officeGroups.size()).first;
+            officeGroups.push_back({type, {}, {}});
         }
+        officeGroups[it->second].ids.push_back(i);
+        officeGroups[it->second].paths.push_back(files[i].path);
     }
     
     // ========== STEP 2: Execute batch Office comparison (ONLY ONCE!) ==========
-  std::map<size_t, SimilarityFinder::ComparisonResult> officeResults;
-if (!officeComparisons.empty()) {
-    officeResults = similarityFinder.compareOfficeFilesBatch(officeComparisons);
+  SimilarityFinder::BatchResults officeResults;
+if (!officeGroups.empty()) {
+    officeResults = similarityFinder.compareOfficeGroups(officeGroups);
 }
 
 // ========== STEP 3: Process all files and use cached Office results ==========
@@ -641,37 +1002,36 @@ for (size_t i = 0; i < files.size(); i++) {
             
             // Use pre-computed Office results
             if (files[i].type == "word" || files[i].type == "excel" || files[i].type == "powerpoint") {
-                auto it = comparisonIndexMap.find({i, j});
-                if (it != comparisonIndexMap.end()) {
-                    size_t batchIndex = it->second;
-                    auto resultIt = officeResults.find(batchIndex);
-                    
-                    if (resultIt != officeResults.end()) {
-                        similar = resultIt->second.similar;
-                        score = resultIt->second.score;
-                       
-                        
-                    } else {
-                        
-                        // Fallback if batch failed for this pair
-                        if (files[i].type == "word") {
-                            auto result = similarityFinder.areWordSimilarFallback(files[i], files[j]);
-                            similar = result.first;
-                            score = result.second;
-                        } else if (files[i].type == "excel") {
-                            auto result = similarityFinder.areExcelSimilarFallback(files[i], files[j]);
-                            similar = result.first;
-                            score = result.second;
-                        } else if (files[i].type == "powerpoint") {
-                            auto result = similarityFinder.arePowerPointSimilarFallback(files[i], files[j]);
-                            similar = result.first;
-                            score = result.second;
-                            
-                        }
+                // Only similar pairs are reported; once the comparer finished,
+                // a missing pair was compared and is not similar
+                auto resultIt = officeResults.similar.find({i, j});
+                
+                if (resultIt != officeResults.similar.end()) {
+                    similar = resultIt->second.similar;
+                    score = resultIt->second.score;
+                } else if (!officeResults.finished) {
+                    // Fallback if batch failed for this pair
+                    if (files[i].type == "word") {
+                        auto result = similarityFinder.areWordSimilarFallback(files[i], files[j]);
+                        similar = result.first;
+                        score = result.second;
+                    } else if (files[i].type == "excel") {
+                        auto result = similarityFinder.areExcelSimilarFallback(files[i], files[j]);
+                        similar = result.first;
+                        score = result.second;
+                    } else if (files[i].type == "powerpoint") {
+                        auto result = similarityFinder.arePowerPointSimilarFallback(files[i], files[j]);
+                        similar = result.first;
+                        score = result.second;
                     }
                 }
+            } else if (files[i].type == "text" && officeResults.finished) {
+                // Plain text: Jaccard of all pairs computed in one batch
+                auto result = similarityFinder.areDocumentsSimilar(files[i], files[j], officeResults, i, j);
+                similar = result.first;
+                score = result.second;
             } else {
-                // Non-Office files: use existing methods
+                // Other files (and plain text if the batch failed): use existing methods
                 auto result = similarityFinder.areFilesSimilar(files[i], files[j]);
                 similar = result.first;
                 score = result.second;
@@ -707,6 +1067,27 @@ for (size_t i = 0; i < files.size(); i++) {
 
 return similarGroups;
 }
+
+std::vector<OverlapPair> FileScanner::findOverlappingFiles(const std::vector<FileInfo>& files,
+                                                          double threshold) {
+    ChunkIndex index;
+    int processed = 0;
+
+    for (size_t i = 0; i < files.size(); i++) {
+        if (!index.addFile(i, files[i].path))
+            std::cerr << "Warning: Could not read " << files[i].path << std::endl;
+
+        processed++;
+        if (processed % 20 == 0)
+            std::cerr << "Chunked " << processed << "/" << files.size() << " files" << std::endl;
+    }
+
+    std::cerr << "Chunk index: " << index.chunkCount() << " chunks from "
+              << index.scannedBytes() / (1024 * 1024) << " MB, "
+              << index.commonChunkCount() << " common chunks not compared" << std::endl;
+    return index.findPairs(threshold);
+}
+
 // ---------------------------------------------------------
 // Main function
 // ---------------------------------------------------------
@@ -720,16 +1101,29 @@ int main(int argc, char* argv[]) {
     
     // ===== Argument check =====
     if (argc < 2) {
-        std::cerr << "Usage: " << argv[0] << " <directory> [--similar]" << std::endl;
+        std::cerr << "Usage: " << argv[0]
+                  << " <directory> [--similar [--text-lines 50]] [--overlap [--overlap-threshold 0.5]]"
+                  << std::endl;
         return 1;
     }
 
     std::string directory = argv[1];
-    bool findSimilar = (argc >= 3 && std::string(argv[2]) == "--similar");
+    bool findSimilar = false;
+    bool findOverlap = false;
+    double overlapThreshold = 0.5;
+    int textLines = SimilarityFinder::DEFAULT_TEXT_LINES;
+    for (int a = 2; a < argc; a++) {
+        std::string arg = argv[a];
+        if (arg == "--similar") findSimilar = true;
+        else if (arg == "--overlap") findOverlap = true;
+        else if (arg == "--overlap-threshold" && a + 1 < argc) overlapThreshold = std::atof(argv[++a]);
+        else if (arg == "--text-lines" && a + 1 < argc) textLines = std::max(1, std::atoi(argv[++a]));
+    }
 
     std::cerr << "Scanning directory: " << directory << std::endl;
 
     FileScanner scanner;
+    scanner.setTextLines(textLines);
     auto files = scanner.findFiles(directory);
 
     if (files.empty()) {
@@ -740,25 +1134,25 @@ int main(int argc, char* argv[]) {
     // ===== Step 1: Exact duplicates =====
     auto exactDuplicates = scanner.findExactDuplicates(files);
 
-    // Print exact duplicate groups
+    // Print exact duplicate groups (file lines: path|similarity|size in bytes)
     for (const auto& [hash, fileList] : exactDuplicates) {
         if (fileList.size() > 1) {
             std::cout << "EXACT|1.0" << std::endl;
             for (const auto& file : fileList)
-                std::cout << file.path << std::endl;
+                std::cout << file.path << "|1.0|" << file.size_bytes << std::endl;
             std::cout << "---GROUP---" << std::endl;
         }
     }
 
+    // Exclude known exact duplicates from the later steps (keep only first file per group)
+    std::set<std::string> duplicatePaths;
+    for (const auto& [hash, fileList] : exactDuplicates) {
+        for (size_t i = 1; i < fileList.size(); ++i)
+            duplicatePaths.insert(fileList[i].path);
+    }
+
     // ===== Step 2: Similar files (optional) =====
     if (findSimilar) {
-        // Exclude known exact duplicates (keep only first file per group)
-        std::set<std::string> duplicatePaths;
-        for (const auto& [hash, fileList] : exactDuplicates) {
-            for (size_t i = 1; i < fileList.size(); ++i)
-                duplicatePaths.insert(fileList[i].path);
-        }
-
         // Filter files for similarity comparison
         std::vector<FileInfo> filesForSimilarity;
         filesForSimilarity.reserve(files.size());
@@ -792,7 +1186,7 @@ int main(int argc, char* argv[]) {
             std::cout << "SIMILAR|" << std::fixed << std::setprecision(2) << avgScore << std::endl;
             for (const auto& f : group)
                 std::cout << f.path << "|" << std::fixed << std::setprecision(2)
-                          << f.similarity_score << std::endl;
+                          << f.similarity_score << "|" << f.size_bytes << std::endl;
             std::cout << "---GROUP---" << std::endl;
         }
     } else {
@@ -800,5 +1194,26 @@ int main(int argc, char* argv[]) {
         std::cerr << "TOTAL_WORK: " << files.size() << std::endl;
     }
 
+    // ===== Step 3: Partially overlapping large files (optional) =====
+    if (findOverlap) {
+        std::vector<FileInfo> filesForOverlap;
+        for (const auto& file : files) {
+            if (file.size_bytes >= FileScanner::MIN_OVERLAP_FILE_SIZE &&
+                duplicatePaths.find(file.path) == duplicatePaths.end())
+                filesForOverlap.push_back(file);
+        }
+
+        // One pair per group: OVERLAP|<shared ratio>|<reclaimable bytes>
+        auto overlapping = scanner.findOverlappingFiles(filesForOverlap, overlapThreshold);
+        for (const auto& pair : overlapping) {
+            std::cout << "OVERLAP|" << std::fixed << std::setprecision(2) << pair.ratio
+                      << "|" << pair.sharedBytes << std::endl;
+            for (size_t id : {pair.file1, pair.file2})
+                std::cout << filesForOverlap[id].path << "|" << pair.ratio << "|"
+                          << filesForOverlap[id].size_bytes << std::endl;
+            std::cout << "---GROUP---" << std::endl;
+        }
+    }
+
     return 0;
 }
@@ -1,34 +1,290 @@
 import sys
 import json
-from docx import Document
-from pptx import Presentation
 import re
-from multiprocessing import Pool
+import multiprocessing
 import os
-from openpyxl import load_workbook
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import sqlite3
+import pickle
+import zlib
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
+import time
+import argparse
+import queue
+import weakref
+import heapq
+import itertools
+import signal
+from array import array
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager, nullcontext
 
-def extract_word_text(filepath):
-    """Extract text from Word document"""
+# NOTE: docx, pptx, openpyxl, numpy and sklearn are imported inside the
+# functions that need them. Importing them all up front costs more than a
+# second, paid again by every Pool worker (spawn) and by daemon clients -
+# this way a worker only loads the parser for file types it actually sees,
+# and sklearn is only imported in the parent that scores text.
+# Check with: python benchmarks/startup_budget.py
+
+# Bump whenever extraction output changes so stale cache entries are re-parsed
+PARSER_VERSION = 4
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "office_cache.sqlite")
+DEFAULT_CACHE_SIZE_MB = 512
+
+
+class ExtractionCache:
+    """
+    Cache of extracted Office content
+    - on disk (SQLite, persists between scans), if db_path is given
+    - in memory (LRU, used by the long-lived daemon), if memory_bytes > 0
+    Entries are keyed by (path, size, mtime, parser version), so a file
+    that changed since the last scan is simply parsed again.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024,
+                 memory_bytes=0):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats = {}  # filepath -> (size, mtime_ns) seen at lookup time
+        self._used = []   # paths to touch for LRU bookkeeping
+        self._memory = OrderedDict()  # filepath -> (file_type, size, mtime_ns, data, nbytes)
+        self._memory_used = 0
+
+        self.conn = None
+        if db_path is not None:
+            self.conn = sqlite3.connect(db_path, timeout=30)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "path TEXT PRIMARY KEY, file_type TEXT, size INTEGER, mtime_ns INTEGER, "
+                "version INTEGER, data BLOB, nbytes INTEGER, last_used REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+            self.conn.commit()
+
+    def get(self, filepath, file_type):
+        """Return cached content for filepath, or None on a miss"""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            self.misses += 1
+            return None
+        self._stats[filepath] = (st.st_size, st.st_mtime_ns)
+
+        entry = self._memory.get(filepath)
+        if entry is not None:
+            if entry[:3] == (file_type, st.st_size, st.st_mtime_ns):
+                self._memory.move_to_end(filepath)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[3]
+            self._forget(filepath)
+
+        if self.conn is None:
+            self.misses += 1
+            return None
+
+        row = self.conn.execute(
+            "SELECT data FROM entries WHERE path = ? AND file_type = ? AND size = ? "
+            "AND mtime_ns = ? AND version = ?",
+            (filepath, file_type, st.st_size, st.st_mtime_ns, PARSER_VERSION)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        try:
+            raw = zlib.decompress(row[0])
+            data = pickle.loads(raw)
+        except Exception:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._used.append(filepath)
+        self._remember(filepath, file_type, data, len(raw))
+        return data
+
+    def put(self, filepath, file_type, data):
+        """Store extracted content (failed extractions are not cached)"""
+        if data is None or filepath not in self._stats:
+            return
+        # Use the stat taken at lookup time: if the file changes while it is
+        # being parsed, the next scan sees a different key and re-parses it
+        size, mtime_ns = self._stats[filepath]
+        raw = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(filepath, file_type, data, len(raw))
+
+        if self.conn is None:
+            return
+        blob = zlib.compress(raw, 1)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (filepath, file_type, size, mtime_ns, PARSER_VERSION, blob, len(blob), time.time())
+        )
+
+    def _remember(self, filepath, file_type, data, nbytes):
+        """Keep an entry in the in-memory LRU (bounded by memory_bytes)"""
+        if nbytes > self.memory_bytes:
+            return
+        self._forget(filepath)
+        size, mtime_ns = self._stats[filepath]
+        self._memory[filepath] = (file_type, size, mtime_ns, data, nbytes)
+        self._memory_used += nbytes
+        while self._memory_used > self.memory_bytes:
+            _, oldest = self._memory.popitem(last=False)
+            self._memory_used -= oldest[4]
+
+    def _forget(self, filepath):
+        entry = self._memory.pop(filepath, None)
+        if entry is not None:
+            self._memory_used -= entry[4]
+
+    def flush(self):
+        """Commit pending writes, refresh LRU timestamps and enforce the size bound"""
+        self._stats = {}
+        if self.conn is None:
+            return
+
+        now = time.time()
+        self.conn.executemany("UPDATE entries SET last_used = ? WHERE path = ?",
+                              [(now, path) for path in self._used])
+        self._used = []
+
+        total = self.conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            # Evict least recently used entries until we are back under budget
+            victims = []
+            for path, nbytes in self.conn.execute(
+                    "SELECT path, nbytes FROM entries ORDER BY last_used ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append((path,))
+                total -= nbytes
+            self.conn.executemany("DELETE FROM entries WHERE path = ?", victims)
+            self.evictions += len(victims)
+
+        self.conn.commit()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+
+    def reset_counters(self):
+        self.hits = self.memory_hits = self.misses = self.evictions = 0
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        text = (f"Extraction cache: {self.hits} hits, {self.misses} misses "
+                f"({rate:.0f}% hit rate), {self.evictions} evicted")
+        if self.memory_bytes:
+            text += f", {self.memory_hits} served from memory"
+        return text
+
+
+# OOXML namespaces for the fast ZIP/XML text extractors
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DRAWING_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+PRESENTATION_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+RELATIONSHIP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+def stream_xml_text(xml_file, parts, budget, ns, block_tags=()):
+    """
+    Collect the text runs of one OOXML part with an incremental parser
+    Finished elements are removed from their parent right away, so memory
+    stays proportional to the nesting depth, not to the document size.
+    - ns: WORD_NS (<w:t> runs) or DRAWING_NS (<a:t> runs); both name their
+      text/paragraph/run/tab/break elements t/p/r/tab/br
+    - block_tags: elements that end with a space (PowerPoint shapes)
+    Returns the remaining character budget (None = unlimited)
+    """
+    text_tag, paragraph_tag, run_tag, tab_tag = ns + "t", ns + "p", ns + "r", ns + "tab"
+    break_tags = (ns + "br", ns + "cr")
+    stack = []
+    
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        
+        stack.pop()
+        tag = elem.tag
+        parent_tag = stack[-1].tag if stack else None
+        
+        if tag == text_tag:
+            if elem.text:
+                parts.append(elem.text)
+                if budget is not None:
+                    budget -= len(elem.text)
+        elif parent_tag == run_tag and tag == tab_tag:
+            parts.append("\t")
+        elif parent_tag in (run_tag, paragraph_tag) and tag in break_tags:
+            parts.append("\n")
+        elif tag == paragraph_tag:
+            parts.append("\n")
+        elif tag in block_tags:
+            parts.append(" ")
+        
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+        
+        if budget is not None and budget <= 0:
+            break
+    
+    return budget
+
+def extract_word_text_xml(filepath, max_chars=None):
+    """Fast path: stream <w:t> runs out of word/document.xml without python-docx"""
+    parts = []
+    with zipfile.ZipFile(filepath) as zf:
+        with zf.open("word/document.xml") as xml_file:
+            stream_xml_text(xml_file, parts, max_chars, WORD_NS)
+    text = "".join(parts).strip()
+    return text[:max_chars] if max_chars else text
+
+def extract_word_text(filepath, max_chars=None):
+    """Extract text from Word document (ZIP/XML fast path, python-docx as fallback)"""
+    try:
+        text = extract_word_text_xml(filepath, max_chars)
+        if text:
+            return text
+    except Exception:
+        pass
+    
+    from docx import Document
     try:
         doc = Document(filepath)
-        text = ""
+        parts = []
         for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
+            parts.append(paragraph.text + "\n")
         for table in doc.tables:
             for row in table.rows:
                 for cell in row.cells:
-                    text += cell.text + " "
-        return text.strip()
+                    parts.append(cell.text + " ")
+        text = "".join(parts).strip()
+        return text[:max_chars] if max_chars else text
     except Exception as e:
         return None
 
 def load_excel_fast(filepath):
     """
     Fast Excel loading using openpyxl directly
-    Returns dict of sheet_name -> list of rows (as lists)
+    Returns dict of sheet_name -> hashed cell arrays (see sheet_to_arrays)
     """
+    from openpyxl import load_workbook
     try:
         # read_only=True and data_only=True make it MUCH faster
         wb = load_workbook(filepath, read_only=True, data_only=True)
@@ -44,7 +300,7 @@ def load_excel_fast(filepath):
                 if any(cell is not None for cell in row):
                     rows.append(row)
             
-            sheets_data[sheet_name] = rows
+            sheets_data[sheet_name] = sheet_to_arrays(rows)
         
         wb.close()
         return sheets_data
@@ -53,10 +309,75 @@ def load_excel_fast(filepath):
         print(f"Error loading Excel {filepath}: {e}", file=sys.stderr)
         return None
 
-def compare_excel_fast(data1, data2):
+def _hash64(kind, text):
+    """Stable signed 64-bit hash (Python's hash() is salted per process)"""
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8, person=kind).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def cell_hashes(value):
+    """
+    Hash one cell for the two equality rules of compare_sheets_fast:
+    - value hash: equal for cells where val1 == val2 (numbers compare across
+      int/float/bool, so 1 == 1.0 == True share a hash in a separate domain)
+    - string hash: equal for cells where str(val1) == str(val2)
+      (this also covers None == None)
+    """
+    text_hash = _hash64(b"str", str(value))
+    
+    if isinstance(value, (bool, int, float)):
+        if isinstance(value, float) and not value.is_integer():
+            # NaN never equals itself, but str() still matches 'nan' == 'nan'
+            key = repr(value)
+        else:
+            key = str(int(value))
+        return _hash64(b"num", key), text_hash
+    
+    return text_hash, text_hash
+
+def sheet_to_arrays(rows):
+    """
+    Convert a sheet (list of row tuples) to compact NumPy arrays, once at load time
+    Returns dict with
+    - 'value': int64 matrix of value hashes (rows x widest row, 0-padded)
+    - 'text': int64 matrix of str() hashes
+    - 'row_lengths': int64 length of each original row
+    - 'digest': int64 [rows, widest row, compared cells, content hash], the
+      sheet fingerprint used to skip comparing identical sheets
+    """
+    import numpy as np
+    width = max((len(row) for row in rows), default=0)
+    value_hashes = np.zeros((len(rows), width), dtype=np.int64)
+    text_hashes = np.zeros((len(rows), width), dtype=np.int64)
+    row_lengths = np.zeros(len(rows), dtype=np.int64)
+    
+    # Cell values repeat a lot, so hash every distinct value only once
+    seen = {}
+    for i, row in enumerate(rows):
+        row_lengths[i] = len(row)
+        for j, value in enumerate(row):
+            # repr() for floats: -0.0 == 0.0 as dict keys, but str() differs
+            key = (float, repr(value)) if type(value) is float else (type(value), value)
+            hashes = seen.get(key)
+            if hashes is None:
+                hashes = seen[key] = cell_hashes(value)
+            value_hashes[i, j], text_hashes[i, j] = hashes
+    
+    content = hashlib.blake2b(digest_size=8)
+    for arr in (row_lengths, value_hashes, text_hashes):
+        content.update(arr.tobytes())
+    content_hash = int.from_bytes(content.digest(), "little", signed=True)
+    digest = np.array([len(rows), width, row_lengths.sum(), content_hash], dtype=np.int64)
+    
+    return {'value': value_hashes, 'text': text_hashes, 'row_lengths': row_lengths, 'digest': digest}
+
+EXCEL_SIMILARITY_THRESHOLD = 0.7
+
+def compare_excel_fast(data1, data2, threshold=None):
     """
     Compare Excel data loaded with openpyxl (fast!)
-    data1, data2 = dict of sheet_name -> list of rows
+    data1, data2 = dict of sheet_name -> hashed cell arrays
+    With a threshold, stops as soon as the average can no longer exceed it
+    and returns the partial (lower) score - not similar either way
     """
     try:
         if data1 is None or data2 is None:
@@ -68,23 +389,41 @@ def compare_excel_fast(data1, data2):
         if not common_sheets:
             return 0.0
         
-        total_similarity = 0
-        sheet_count = 0
-        
+        # Fingerprints settle identical and non-overlapping sheets for free
+        sheet_scores = {}
+        ambiguous = []
         for sheet_name in common_sheets:
-            sheet_similarity = compare_sheets_fast(data1[sheet_name], data2[sheet_name])
-            total_similarity += sheet_similarity
-            sheet_count += 1
+            score = quick_sheet_score(data1[sheet_name], data2[sheet_name])
+            if score is None:
+                ambiguous.append(sheet_name)
+            else:
+                sheet_scores[sheet_name] = score
         
-        if sheet_count == 0:
-            return 0.0
+        # Small sheets first, so an early exit skips the expensive ones
+        ambiguous.sort(key=lambda name: data1[name]['value'].size + data2[name]['value'].size)
+        sheet_count = len(common_sheets)
+        for k, sheet_name in enumerate(ambiguous):
+            if threshold is not None:
+                best_possible = sum(sheet_scores.values()) + len(ambiguous) - k
+                if best_possible < threshold * sheet_count - 1e-9:
+                    return sum(sheet_scores.values()) / sheet_count
+            sheet_scores[sheet_name] = compare_sheet_arrays(data1[sheet_name], data2[sheet_name])
         
-        return total_similarity / sheet_count
+        return sum(sheet_scores[name] for name in common_sheets) / sheet_count
         
     except Exception as e:
         print(f"Error comparing Excel: {e}", file=sys.stderr)
         return 0.0
 
+def quick_sheet_score(sheet1, sheet2):
+    """Score of a sheet pair from its fingerprints alone, None if it needs comparing"""
+    if len(sheet1['row_lengths']) == 0 or len(sheet2['row_lengths']) == 0:
+        return 0.0
+    if (sheet1['digest'] == sheet2['digest']).all():
+        # Same shape and content: every compared cell matches
+        return 1.0 if sheet1['digest'][2] > 0 else 0.0
+    return None
+
 def compare_sheets_fast(rows1, rows2):
     """
     Compare two sheets (as lists of rows)
@@ -124,23 +463,101 @@ def compare_sheets_fast(rows1, rows2):
     
     return matching_cells / compared_cells if compared_cells > 0 else 0.0
 
-def extract_powerpoint_text(filepath):
-    """Extract text from PowerPoint"""
+def compare_sheet_arrays(sheet1, sheet2):
+    """
+    Vectorized version of compare_sheets_fast on sheet_to_arrays() output
+    Same overlap region and equality rule, one NumPy reduction instead of a cell loop
+    """
+    import numpy as np
+    min_rows = min(len(sheet1['row_lengths']), len(sheet2['row_lengths']))
+    if min_rows == 0:
+        return 0.0
+    
+    # Per row, compare up to the shorter of the two rows
+    limits = np.minimum(sheet1['row_lengths'][:min_rows], sheet2['row_lengths'][:min_rows])
+    compared_cells = int(limits.sum())
+    if compared_cells == 0:
+        return 0.0
+    
+    min_cols = min(sheet1['value'].shape[1], sheet2['value'].shape[1])
+    in_region = np.arange(min_cols) < limits[:, None]
+    
+    value1 = sheet1['value'][:min_rows, :min_cols]
+    value2 = sheet2['value'][:min_rows, :min_cols]
+    text1 = sheet1['text'][:min_rows, :min_cols]
+    text2 = sheet2['text'][:min_rows, :min_cols]
+    
+    matches = ((value1 == value2) | (text1 == text2)) & in_region
+    return int(np.count_nonzero(matches)) / compared_cells
+
+def powerpoint_slide_parts(zf):
+    """Slide XML part names in presentation order"""
+    try:
+        with zf.open("ppt/_rels/presentation.xml.rels") as f:
+            targets = {rel.get("Id"): rel.get("Target")
+                       for rel in ET.parse(f).getroot().iter(PACKAGE_REL_NS + "Relationship")}
+        with zf.open("ppt/presentation.xml") as f:
+            slide_ids = ET.parse(f).getroot().iter(PRESENTATION_NS + "sldId")
+            parts = []
+            for slide_id in slide_ids:
+                target = targets.get(slide_id.get(RELATIONSHIP_NS + "id"), "")
+                target = target.lstrip("/")
+                parts.append(target if target.startswith("ppt/") else "ppt/" + target)
+        if parts:
+            return parts
+    except KeyError:
+        pass
+    
+    # No usable presentation.xml: fall back to slide number order
+    names = [n for n in zf.namelist() if re.fullmatch(r"ppt/slides/slide\d+\.xml", n)]
+    return sorted(names, key=lambda n: int(re.search(r"(\d+)\.xml$", n).group(1)))
+
+def extract_powerpoint_text_xml(filepath, max_chars=None):
+    """Fast path: stream <a:t> runs out of ppt/slides/*.xml without python-pptx"""
+    parts = []
+    budget = max_chars
+    with zipfile.ZipFile(filepath) as zf:
+        for part_name in powerpoint_slide_parts(zf):
+            with zf.open(part_name) as xml_file:
+                budget = stream_xml_text(xml_file, parts, budget, DRAWING_NS,
+                                         block_tags=(PRESENTATION_NS + "sp", PRESENTATION_NS + "graphicFrame"))
+            if budget is not None and budget <= 0:
+                break
+    text = "".join(parts).strip()
+    return text[:max_chars] if max_chars else text
+
+def extract_powerpoint_text(filepath, max_chars=None):
+    """Extract text from PowerPoint (ZIP/XML fast path, python-pptx as fallback)"""
+    try:
+        text = extract_powerpoint_text_xml(filepath, max_chars)
+        if text:
+            return text
+    except Exception:
+        pass
+    
+    from pptx import Presentation
     try:
         prs = Presentation(filepath)
-        text = ""
+        parts = []
         for slide in prs.slides:
             for shape in slide.shapes:
                 if hasattr(shape, "text"):
-                    text += shape.text + " "
-        return text.strip()
+                    parts.append(shape.text + " ")
+        text = "".join(parts).strip()
+        return text[:max_chars] if max_chars else text
     except Exception as e:
         return None
 
+TEXT_SIMILARITY_THRESHOLD = 0.6
+
 def calculate_text_similarity(text1, text2):
     """Fast TF-IDF similarity"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
     if not text1 or not text2:
         return 0.0
+    if isinstance(text1, HashedTerms):
+        return calculate_text_similarity_batch([text1, text2], [(0, 1)])[0]
     
     try:
         vectorizer = TfidfVectorizer()
@@ -150,11 +567,929 @@ def calculate_text_similarity(text1, text2):
     except:
         return 0.0
 
-def compare_files_batch(comparisons):
+def fit_tfidf(texts):
+    """
+    One TF-IDF fit over all texts (strings or HashedTerms)
+    Returns the L2-normalized sparse matrix, one row per text, or None if
+    no document has a usable word
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+    try:
+        if isinstance(texts[0], HashedTerms):
+            # Already counted in the workers: only IDF weighting is left
+            return TfidfTransformer().fit_transform(hashed_matrix(texts))
+        return TfidfVectorizer().fit_transform(texts)
+    except ValueError:
+        # Empty vocabulary
+        return None
+
+def calculate_text_similarity_batch(texts, pairs):
+    """
+    TF-IDF similarity for many pairs with ONE vectorizer fit
+    texts = list of documents (strings or HashedTerms), pairs = list of (row1, row2) indices into texts
+    Returns a list of scores in the same order as pairs
+    """
+    import numpy as np
+    if not pairs:
+        return []
+    
+    tfidf_matrix = fit_tfidf(texts)
+    if tfidf_matrix is None:
+        return [0.0] * len(pairs)
+    
+    # Rows are already L2-normalized, so cosine similarity is a row-wise dot product
+    rows1 = [p[0] for p in pairs]
+    rows2 = [p[1] for p in pairs]
+    similarities = np.asarray(tfidf_matrix[rows1].multiply(tfidf_matrix[rows2]).sum(axis=1)).ravel()
+    return [float(s) for s in similarities]
+
+def score_text_pairs_corpus(comparisons, file_cache):
+    """
+    Score all Word/PowerPoint comparisons with one TF-IDF fit per file type
+    Returns dict: comparison index -> similarity
+    """
+    scores = {}
+    for file_type in ('word', 'powerpoint'):
+        row_of = {}   # filepath -> row in the corpus matrix
+        texts = []
+        pairs = []
+        pair_indices = []
+        
+        for i, comp in enumerate(comparisons):
+            if comp['type'] != file_type:
+                continue
+            text1 = file_cache[comp['file1']]
+            text2 = file_cache[comp['file2']]
+            if not text1 or not text2:
+                scores[i] = 0.0
+                continue
+            
+            for filepath, text in ((comp['file1'], text1), (comp['file2'], text2)):
+                if filepath not in row_of:
+                    row_of[filepath] = len(texts)
+                    texts.append(text)
+            pairs.append((row_of[comp['file1']], row_of[comp['file2']]))
+            pair_indices.append(i)
+        
+        for i, similarity in zip(pair_indices, calculate_text_similarity_batch(texts, pairs)):
+            scores[i] = similarity
+    
+    return scores
+
+# ================== HASHED TEXT FEATURES ==================
+HASHED_FEATURES = 2 ** 20
+
+class HashedTerms:
+    """
+    Compact form of a Word/PowerPoint document: term counts of hashed
+    words, like one row of sklearn's HashingVectorizer (same tokens as
+    TfidfVectorizer). Empty documents are falsy, like empty strings.
+    """
+
+    def __init__(self, indices, counts):
+        self.indices = indices  # array('I') of sorted feature ids
+        self.counts = counts    # array('I') of term counts
+
+    def __bool__(self):
+        return len(self.indices) > 0
+
+def hash_terms(text, n_features=HASHED_FEATURES):
+    """Reduce extracted text to HashedTerms (runs in the workers, stdlib only)"""
+    counts = Counter(zlib.crc32(word.encode("utf-8", "ignore")) % n_features
+                     for word in WORD_PATTERN.findall(text.lower()))
+    features = sorted(counts)
+    return HashedTerms(array('I', features), array('I', (counts[f] for f in features)))
+
+def hashed_matrix(documents, n_features=HASHED_FEATURES):
+    """Sparse term-count matrix with one row per HashedTerms document"""
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    
+    indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(doc.indices) for doc in documents])
+    indices = np.concatenate([np.frombuffer(doc.indices, dtype=np.uint32) for doc in documents])
+    counts = np.concatenate([np.frombuffer(doc.counts, dtype=np.uint32) for doc in documents])
+    return csr_matrix((counts.astype(np.float64), indices.astype(np.int32), indptr),
+                      shape=(len(documents), n_features))
+
+
+# ================== STATS / PROFILING ==================
+DEFAULT_STATS_TOP = 10
+# Load time histogram buckets: (upper bound in seconds, label)
+LOAD_TIME_BUCKETS = ((0.01, "<10ms"), (0.1, "<100ms"), (1.0, "<1s"), (10.0, "<10s"),
+                     (float("inf"), ">=10s"))
+
+class Stats:
+    """
+    Timings and counters of one request (--stats)
+    - stages: wall time per stage (load, tfidf, excel, text, minhash)
+    - loads: parse time of every file a worker loaded, measured in the worker
+    - pairs: compared and similar pairs per file type
+    Cache and prefilter counters are read from their own objects in report().
+    """
+
+    def __init__(self, top=DEFAULT_STATS_TOP):
+        self.top = top
+        self.started = time.perf_counter()
+        self.stages = Counter()
+        self.loads = []  # (seconds, filepath, file type, on-disk size)
+        self.pairs = {}  # file type -> Counter with 'compared' and 'similar'
+        self.worker_peak_rss = None
+
+    def add_time(self, stage, seconds):
+        self.stages[stage] += seconds
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_load(self, filepath, file_type, seconds, size):
+        self.loads.append((seconds, filepath, file_type, size))
+
+    def add_worker_rss(self, rss):
+        if rss is not None:
+            self.worker_peak_rss = max(self.worker_peak_rss or 0, rss)
+
+    def add_pairs(self, file_type, compared, similar):
+        counts = self.pairs.setdefault(file_type, Counter())
+        counts['compared'] += compared
+        counts['similar'] += similar
+
+    def report(self, cache=None, prefilter=None):
+        """The stats object added to the output (JSON-serializable)"""
+        loads = {}
+        for seconds, _, file_type, size in self.loads:
+            entry = loads.setdefault(file_type, {
+                'files': 0, 'bytes': 0, 'seconds': 0.0,
+                'histogram': dict.fromkeys((label for _, label in LOAD_TIME_BUCKETS), 0)})
+            entry['files'] += 1
+            entry['bytes'] += size
+            entry['seconds'] += seconds
+            entry['histogram'][next(label for limit, label in LOAD_TIME_BUCKETS if seconds < limit)] += 1
+        for entry in loads.values():
+            entry['seconds'] = round(entry['seconds'], 3)
+        
+        report = {
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'stages': {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+            'loads': loads,
+            'slowest_files': [{'path': filepath, 'type': file_type, 'seconds': round(seconds, 4), 'bytes': size}
+                              for seconds, filepath, file_type, size in heapq.nlargest(self.top, self.loads)],
+            'pairs': {file_type: dict(counts) for file_type, counts in self.pairs.items()},
+            'peak_rss_bytes': peak_rss_bytes(),
+            'worker_peak_rss_bytes': self.worker_peak_rss,
+        }
+        if cache is not None:
+            lookups = cache.hits + cache.misses
+            report['cache'] = {'hits': cache.hits, 'memory_hits': cache.memory_hits,
+                               'misses': cache.misses, 'evictions': cache.evictions,
+                               'hit_rate': round(cache.hits / lookups, 3) if lookups else None}
+        if prefilter is not None:
+            report['prefilter'] = dict(prefilter.counters, files=len(prefilter.files),
+                                       files_not_parsed=len(prefilter.files_not_parsed))
+        return report
+
+def timed(stats, stage):
+    """Add the time of a with-block to a stage of stats (no-op without stats)"""
+    return stats.timer(stage) if stats is not None else nullcontext()
+
+def peak_rss_bytes():
+    """Peak resident memory of this process, None where it can't be read (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def profile_prefix(profile_dir):
+    """File name prefix of one request's --profile output"""
+    profile_dir = os.path.abspath(profile_dir)  # workers may run in another directory
+    os.makedirs(profile_dir, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+    return os.path.join(profile_dir, f"comparer-{stamp}-{os.getpid()}")
+
+_worker_profile = None  # (prefix, cProfile.Profile) of this loader process
+
+def worker_profiler(prefix):
+    """The profiler of this worker process for the request with this prefix"""
+    global _worker_profile
+    if _worker_profile is None or _worker_profile[0] != prefix:
+        import cProfile
+        _worker_profile = (prefix, cProfile.Profile())
+    return _worker_profile[1]
+
+
+# ================== LOADING ==================
+def default_worker_count():
+    return max(1, os.cpu_count() - 1)  # Leave 1 core free
+
+DEFAULT_MAX_INFLIGHT_MB = 512
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+# Per-file loader budgets are opt-in: big workbooks legitimately take minutes
+DEFAULT_FILE_TIMEOUT = None      # seconds a worker may spend on one file
+DEFAULT_FILE_MEMORY_MB = None    # resident memory a worker may grow to while loading
+DEFAULT_TEXT_LINES = 50          # lines of a plain-text file that are compared
+BATCH_TARGET_BYTES = 8 * 1024 * 1024  # small files are grouped into batches up to this size
+
+class LoadOptions:
+    """
+    How files are loaded
+    - workers: Pool size (default: all cores but one)
+    - max_inflight_bytes: on-disk bytes of files being parsed at the same time;
+      a single file larger than this still runs, but alone
+    - max_tasks_per_child: recycle a worker after this many batches (frees
+      memory fragmented by huge workbooks)
+    - max_chars: optional cap on extracted Word/PowerPoint text
+    - shared_memory: return big Excel results through shared memory (not on Windows)
+    - text_features: 'hashed' reduces Word/PowerPoint text to HashedTerms in the workers
+    - profile_prefix: workers write cProfile stats to <prefix>-worker-<pid>.pstats
+    - file_timeout / file_memory_bytes: per-file budgets (None = unlimited, the
+      default); a worker over budget is killed and its file quarantined
+    - quarantine: optional Quarantine of files that are not loaded at all
+    - text_lines: lines of plain-text files compared by the Jaccard engine
+    """
+
+    def __init__(self, workers=None, max_inflight_bytes=DEFAULT_MAX_INFLIGHT_MB * 1024 * 1024,
+                 max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD, max_chars=None, shared_memory=True,
+                 text_features='text', profile_prefix=None, file_timeout=DEFAULT_FILE_TIMEOUT,
+                 file_memory_bytes=None, quarantine=None,
+                 text_lines=DEFAULT_TEXT_LINES):
+        self.workers = workers or default_worker_count()
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_chars = max_chars
+        self.shared_memory = shared_memory
+        self.text_features = text_features
+        self.profile_prefix = profile_prefix
+        self.file_timeout = file_timeout
+        self.file_memory_bytes = file_memory_bytes
+        self.quarantine = quarantine
+        self.text_lines = text_lines
+
+    def create_pool(self):
+        # Recycled workers are started while the pool's helper threads run;
+        # a plain fork can then copy a held import lock and hang forever.
+        # forkserver (POSIX) and spawn (Windows) start from a clean process
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+        return LoaderPool(context, self.workers, self.max_tasks_per_child or None)
+
+class LoaderPool:
+    """
+    Worker Pool whose workers report every file they start on a status
+    queue, so the parent knows which worker is stuck on which file
+    (see load_in_pool). A killed worker is replaced by the Pool.
+    """
+
+    def __init__(self, context, processes, maxtasksperchild=None):
+        self.status = context.SimpleQueue()
+        self.pool = context.Pool(processes=processes, initializer=init_loader,
+                                 initargs=(self.status,), maxtasksperchild=maxtasksperchild)
+
+    def apply_async(self, *args, **kwargs):
+        return self.pool.apply_async(*args, **kwargs)
+
+    def terminate(self):
+        self.pool.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.terminate()
+
+_loader_status = None  # LoaderPool.status, set in every worker by init_loader
+
+def init_loader(status):
+    global _loader_status
+    _loader_status = status
+
+def report_loading(batch_id, index):
+    """Worker side: tell the parent which file of a batch is being loaded (None = all loaded)"""
+    if _loader_status is not None and batch_id is not None:
+        _loader_status.put((os.getpid(), batch_id, index))
+
+def file_size(filepath):
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
+
+def plan_batches(tasks, sizes, workers):
+    """
+    Group load tasks into batches, largest files first
+    Big files get their own batch so they start early and don't hold up
+    others; small files are grouped (adaptive chunk size, like Pool.map)
+    so per-task IPC overhead stays low.
+    """
+    tasks = sorted(tasks, key=lambda task: sizes[task[0]], reverse=True)
+    chunk = max(1, min(64, len(tasks) // (workers * 4)))
+    
+    batches = []
+    batch = []
+    batch_bytes = 0
+    for task in tasks:
+        size = sizes[task[0]]
+        if batch and (len(batch) >= chunk or batch_bytes + size > BATCH_TARGET_BYTES):
+            batches.append(batch)
+            batch = []
+            batch_bytes = 0
+        batch.append(task)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+# Hashed Excel sheets at least this big are handed from the workers to the
+# parent in a shared memory block instead of being pickled through the
+# result pipe. Not on Windows, where a block disappears as soon as the
+# worker that created it closes it.
+SHARED_MEMORY_MIN_BYTES = 256 * 1024
+SHARED_MEMORY_SUPPORTED = os.name != "nt"
+SHARED_DRAIN_TIMEOUT = 5.0  # seconds to wait for running batches after an error
+
+class SharedSheets:
+    """Picklable handle for hashed Excel sheets placed in a shared memory block"""
+
+    def __init__(self, name, size, layout):
+        self.name = name
+        self.size = size
+        self.layout = layout  # sheet name -> array key -> (offset, dtype, shape)
+
+def share_sheets(sheets):
+    """Worker side: copy hashed sheets into one shared memory block and return its handle"""
+    from multiprocessing import shared_memory
+    import numpy as np
+    
+    layout = {}
+    size = 0
+    for sheet_name, arrays in sheets.items():
+        layout[sheet_name] = {}
+        for key, arr in arrays.items():
+            size = (size + 7) // 8 * 8  # keep every array 8-byte aligned
+            layout[sheet_name][key] = (size, arr.dtype.str, arr.shape)
+            size += arr.nbytes
+    if size < SHARED_MEMORY_MIN_BYTES:
+        return sheets
+    
+    block = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        for sheet_name, arrays in sheets.items():
+            for key, arr in arrays.items():
+                offset = layout[sheet_name][key][0]
+                raw = np.ascontiguousarray(arr).reshape(-1).view(np.uint8)
+                block.buf[offset:offset + raw.size] = raw
+        return SharedSheets(block.name, size, layout)
+    except BaseException:
+        block.unlink()
+        raise
+    finally:
+        block.close()
+
+def attach_sheets(handle):
+    """Parent side: map a SharedSheets block and return zero-copy NumPy views of it"""
+    from multiprocessing import shared_memory
+    import numpy as np
+    
+    block = shared_memory.SharedMemory(name=handle.name)
+    # Unlink right away: the mapping stays valid for as long as the views
+    # exist, and nothing is left behind once they are gone
+    block.unlink()
+    base = np.ndarray((handle.size,), np.uint8, buffer=block.buf)
+    weakref.finalize(base, block.close).atexit = False
+    
+    return {sheet_name: {key: np.ndarray(shape, dtype, buffer=base, offset=offset)
+                         for key, (offset, dtype, shape) in arrays.items()}
+            for sheet_name, arrays in handle.layout.items()}
+
+def discard_shared(items):
+    """Free the blocks of handles that will never be attached (error or cancel)"""
+    from multiprocessing import shared_memory
+    
+    for data in items:
+        if isinstance(data, SharedSheets):
+            try:
+                block = shared_memory.SharedMemory(name=data.name)
+            except FileNotFoundError:
+                continue
+            block.close()
+            block.unlink()
+
+def receive_batch(results):
+    """
+    Resolve the shared memory handles of one loaded batch
+    Returns list of (filepath, content)
+    """
+    received = []
+    try:
+        for filepath, data, _ in results:
+            if isinstance(data, SharedSheets):
+                data = attach_sheets(data)
+            received.append((filepath, data))
+    except BaseException:
+        discard_shared(data for _, data, _ in results[len(received):])
+        raise
+    return received
+
+def load_file_batch(batch, shared=False, profile_prefix=None, batch_id=None):
+    """
+    Worker entry point: load a batch of load_file argument tuples
+    With shared=True big Excel results come back as SharedSheets handles
+    With a profile_prefix the batch runs under this worker's profiler
+    With a batch_id every file is announced with report_loading
+    Returns ([(filepath, content, load seconds), ...], peak RSS of this worker)
+    """
+    profiler = worker_profiler(profile_prefix) if profile_prefix else None
+    if profiler is not None:
+        profiler.enable()
+    results = []
+    try:
+        for index, task in enumerate(batch):
+            report_loading(batch_id, index)
+            start = time.perf_counter()
+            results.append((task[0], load_file(*task), time.perf_counter() - start))
+        report_loading(batch_id, None)
+        
+        # Shared only after the last file: a worker killed while loading
+        # must not leave shared memory blocks behind
+        if shared:
+            for k, (filepath, data, seconds) in enumerate(results):
+                if batch[k][1] == 'excel' and data is not None:
+                    results[k] = (filepath, share_sheets(data), seconds)
+    except BaseException:
+        discard_shared(data for _, data, _ in results)
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            # Workers are terminated without any cleanup, so write after every batch
+            profiler.dump_stats(f"{profile_prefix}-worker-{os.getpid()}.pstats")
+    return results, peak_rss_bytes()
+
+def cache_kind(file_type, max_chars=None, text_features='text'):
+    """Cache entries of capped or hashed extractions must not be mixed with full text"""
+    if file_type not in ('word', 'powerpoint'):
+        return file_type
+    kind = file_type
+    if text_features == 'hashed':
+        kind += ":hashed"
+    if max_chars:
+        kind += f":{max_chars}"
+    return kind
+
+def load_files(files_to_read, cache=None, pool=None, options=None, prefilter=None, stats=None):
+    """
+    Load every file once - cache lookups first, the rest in PARALLEL
+    files_to_read = dict of filepath -> file type
+    pool = optional warm worker Pool (the daemon keeps one), otherwise a new one is created
+    options = LoadOptions (worker count, memory cap, text cap)
+    prefilter = optional Prefilter; unreadable files are not loaded and files
+                with identical content only once
+    stats = optional Stats, gets the load stage time and per-file load times
+    Returns dict of filepath -> content (None if loading failed)
+    """
+    options = options or LoadOptions()
+    start = time.perf_counter()
+    
+    # Workers, cache and quarantine get absolute paths: the daemon's workers
+    # run in its own directory, and a relative path names another file in
+    # another client's directory
+    requested = files_to_read
+    files_to_read = {os.path.abspath(f): t for f, t in requested.items()}
+    
+    skipped = prefilter.skip(files_to_read) if prefilter is not None else {}
+    if skipped:
+        files_to_read = {f: t for f, t in files_to_read.items() if f not in skipped}
+    
+    # Files that hung or exhausted a worker before are not tried again
+    quarantined = set()
+    if options.quarantine is not None:
+        quarantined = {f for f in files_to_read if options.quarantine.contains(f)}
+        if quarantined:
+            files_to_read = {f: t for f, t in files_to_read.items() if f not in quarantined}
+    
+    # Look up files that were already parsed in an earlier scan
+    file_cache = {}
+    if cache is not None:
+        for filepath, file_type in files_to_read.items():
+            data = cache.get(filepath, cache_kind(file_type, options.max_chars, options.text_features))
+            if data is not None:
+                file_cache[filepath] = data
+    
+    # Read remaining files in PARALLEL (this is the slow part!)
+    tasks = [(f, t, options.max_chars, options.text_features)
+             for f, t in files_to_read.items() if f not in file_cache]
+    if tasks:
+        if pool is not None:
+            loaded = load_in_pool(pool, tasks, options, stats)
+        else:
+            with options.create_pool() as new_pool:
+                loaded = load_in_pool(new_pool, tasks, options, stats)
+        
+        # Add to dictionary: filepath -> content
+        for filepath, data in loaded:
+            file_cache[filepath] = data
+            if cache is not None:
+                kind = cache_kind(files_to_read[filepath], options.max_chars, options.text_features)
+                cache.put(filepath, kind, data)
+    
+    if cache is not None:
+        cache.flush()
+    
+    for filepath in quarantined:
+        file_cache[filepath] = None
+    for filepath, original in skipped.items():
+        file_cache[filepath] = file_cache[original] if original is not None else None
+    if stats is not None:
+        stats.add_time('load', time.perf_counter() - start)
+    return {f: file_cache[os.path.abspath(f)] for f in requested}
+
+BATCH_IDS = itertools.count()  # unique across requests (the daemon's pool outlives them)
+WATCHDOG_INTERVAL = 0.2  # seconds between checks of the per-file budgets
+
+def load_in_pool(pool, tasks, options, stats=None):
+    """
+    Run load tasks on the pool, largest files first, with at most
+    options.max_inflight_bytes (on-disk size) being parsed at once
+    A worker that spends more than options.file_timeout seconds on one file
+    or grows past options.file_memory_bytes is killed: its file loads as
+    None and is quarantined, the rest of its batch is sent again.
+    Returns list of (filepath, content) in completion order
+    """
+    sizes = {task[0]: file_size(task[0]) for task in tasks}
+    file_types = {task[0]: task[1] for task in tasks}
+    todo = deque(plan_batches(tasks, sizes, options.workers))
+    
+    shared = options.shared_memory and SHARED_MEMORY_SUPPORTED
+    watchdog = options.file_timeout or options.file_memory_bytes
+    done = queue.Queue()
+    loaded = []
+    submitted = {}  # batch id -> batch, until its result arrives or its worker is killed
+    running = {}    # worker pid -> (batch id, index in batch, time the file was started)
+    inflight = 0
+    next_check = 0.0
+    
+    def batch_bytes(batch):
+        return sum(sizes[task[0]] for task in batch)
+    
+    def submit(batch):
+        nonlocal inflight
+        batch_id = next(BATCH_IDS)
+        submitted[batch_id] = batch
+        pool.apply_async(load_file_batch, (batch, shared, options.profile_prefix, batch_id),
+                         callback=lambda result: done.put((batch_id, result)),
+                         error_callback=lambda error: done.put((batch_id, error)))
+        inflight += batch_bytes(batch)
+    
+    def finish(batch_id):
+        nonlocal inflight
+        batch = submitted.pop(batch_id)
+        inflight -= batch_bytes(batch)
+        return batch
+    
+    def wait_one():
+        """Wait until a batch is loaded or a worker was killed"""
+        nonlocal next_check
+        while True:
+            # Checked on a clock, not only when idle: other workers may keep
+            # delivering results while one of them is stuck
+            if watchdog and time.monotonic() >= next_check:
+                next_check = time.monotonic() + WATCHDOG_INTERVAL
+                if check_workers():
+                    return
+            try:
+                batch_id, result = done.get(timeout=WATCHDOG_INTERVAL if watchdog else None)
+            except queue.Empty:
+                continue
+            finish(batch_id)
+            if isinstance(result, BaseException):
+                raise result
+            results, worker_rss = result
+            if stats is not None:
+                stats.add_worker_rss(worker_rss)
+                for filepath, _, seconds in results:
+                    stats.add_load(filepath, file_types[filepath], seconds, sizes[filepath])
+            loaded.extend(receive_batch(results))
+            return
+    
+    def check_workers():
+        """Kill workers that are over a per-file budget, True if any was killed"""
+        while not pool.status.empty():
+            pid, batch_id, index = pool.status.get()
+            if index is None or batch_id not in submitted:
+                running.pop(pid, None)
+            else:
+                running[pid] = (batch_id, index, time.monotonic())
+        
+        killed = False
+        for pid, (batch_id, index, started) in list(running.items()):
+            if batch_id not in submitted:
+                del running[pid]
+                continue
+            reason = None
+            if options.file_timeout and time.monotonic() - started > options.file_timeout:
+                reason = f"not loaded after {options.file_timeout:g} s"
+            elif options.file_memory_bytes:
+                rss = process_rss_bytes(pid)
+                if rss is not None and rss > options.file_memory_bytes:
+                    reason = f"loader grew to {rss / (1024 * 1024):.0f} MB"
+            if reason is None:
+                continue
+            
+            kill_worker(pid)
+            del running[pid]
+            batch = finish(batch_id)
+            filepath = batch[index][0]
+            print(f"Quarantined {filepath}: {reason}", file=sys.stderr)
+            if options.quarantine is not None:
+                options.quarantine.add(filepath, reason)
+            loaded.append((filepath, None))
+            # Results of the files loaded before it died with the worker
+            rest = batch[:index] + batch[index + 1:]
+            if rest:
+                todo.appendleft(rest)
+            killed = True
+        return killed
+    
+    try:
+        while todo or submitted:
+            # Submit batches until the in-flight byte budget is used up, then
+            # wait for a result; always allow one batch so a single huge file
+            # can still run
+            while todo and (not submitted or
+                            inflight + batch_bytes(todo[0]) <= options.max_inflight_bytes):
+                submit(todo.popleft())
+            wait_one()
+    except BaseException:
+        # Free the shared memory of batches that are still running
+        while submitted:
+            try:
+                batch_id, result = done.get(timeout=SHARED_DRAIN_TIMEOUT)
+            except queue.Empty:
+                break
+            submitted.pop(batch_id, None)
+            if not isinstance(result, BaseException):
+                discard_shared(data for _, data, _ in result[0])
+        raise
+    return loaded
+
+def process_rss_bytes(pid):
+    """Current resident memory of another process, None where it can't be read"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil  # optional, e.g. on Windows and macOS
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+def kill_worker(pid):
+    """Kill a loader process that is over budget (the Pool starts a replacement)"""
+    try:
+        os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+    except OSError:
+        pass  # already gone, e.g. crashed
+
+DEFAULT_QUARANTINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "office_quarantine.json")
+
+class Quarantine:
+    """
+    Files that hung a loader or made it run out of its memory budget
+    Kept in a JSON file (path -> size, mtime, reason) so later scans skip
+    them right away. An entry only matches while size and mtime are
+    unchanged, so a replaced file is tried again; delete an entry to retry
+    the same file.
+    """
+
+    def __init__(self, path=DEFAULT_QUARANTINE_PATH):
+        self.path = path
+        self.entries = self._read()
+        self.skipped = 0
+        self.added = 0
+        self.files = []  # (path, reason) of every file skipped or added in this request
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def contains(self, filepath):
+        entry = self.entries.get(filepath)
+        if entry is None:
+            return False
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return False
+        if (entry['size'], entry['mtime_ns']) != (st.st_size, st.st_mtime_ns):
+            return False
+        self.skipped += 1
+        self.files.append((filepath, entry.get('reason', "")))
+        return True
+
+    def add(self, filepath, reason):
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return
+        entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'reason': reason, 'time': time.time()}
+        self.entries[filepath] = entry
+        self.added += 1
+        self.files.append((filepath, reason))
+        
+        # Merge with what other scans wrote meanwhile and replace the file in one step
+        entries = self._read()
+        entries[filepath] = entry
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Quarantine list not saved ({self.path}): {e}", file=sys.stderr)
+
+    def summary(self):
+        return f"Quarantine: {self.skipped} files skipped, {self.added} newly quarantined"
+
+    def records(self):
+        """The files of this request for the result output (they scored 0 without being compared)"""
+        return [{'quarantined': path, 'reason': reason} for path, reason in self.files]
+
+# ================== PREFILTER ==================
+class Prefilter:
+    """
+    Cheap checks that only read the ZIP central directory (and, for Excel,
+    xl/workbook.xml) before any file is fully parsed. Every stage is exact:
+    - unreadable: not an Office ZIP package, loading would fail -> score 0
+    - no_common_sheets: Excel pair without a sheet name in common -> score 0
+    - identical: every member except docProps/* has the same CRC32 and
+      size, so the files are parsed once and share the extracted content
+    """
+
+    def __init__(self):
+        self.packages = {}  # filepath -> (member signature, sheet names) or None
+        self.counters = dict.fromkeys(('pairs', 'unreadable', 'no_common_sheets', 'identical'), 0)
+        self.files = set()             # files that went through skip()
+        self.files_not_parsed = set()
+
+    def package(self, filepath, file_type):
+        if filepath not in self.packages:
+            self.packages[filepath] = read_package(filepath, file_type)
+        return self.packages[filepath]
+
+    def reject(self, comparisons):
+        """Return the set of comparison indices that can't be similar"""
+        rejected = set()
+        for i, comp in enumerate(comparisons):
+            self.counters['pairs'] += 1
+            package1 = self.package(comp['file1'], comp['type'])
+            package2 = self.package(comp['file2'], comp['type'])
+            
+            if package1 is None or package2 is None:
+                self.counters['unreadable'] += 1
+                rejected.add(i)
+            elif package1[0] == package2[0]:
+                self.counters['identical'] += 1
+            elif package1[1] is not None and package2[1] is not None and not package1[1] & package2[1]:
+                self.counters['no_common_sheets'] += 1
+                rejected.add(i)
+        return rejected
+
+    def reject_group(self, paths, file_type):
+        """
+        reject() for all pairs of one group without listing the pairs
+        Returns (rejected, unmatched):
+        - rejected(a, b): True for an Excel pair without a common sheet name
+          (unreadable files need no check, they load as None)
+        - unmatched: indices of files whose pairs are all rejected, so they
+          don't have to be loaded at all
+        """
+        packages = [self.package(path, file_type) for path in paths]
+        readable = [k for k, package in enumerate(packages) if package is not None]
+        n, r = len(paths), len(readable)
+        self.counters['pairs'] += n * (n - 1) // 2
+        self.counters['unreadable'] += n * (n - 1) // 2 - r * (r - 1) // 2
+        signatures = Counter(packages[k][0] for k in readable)
+        self.counters['identical'] += sum(c * (c - 1) // 2 for c in signatures.values())
+        
+        # A file with known sheet names needs a partner with the same
+        # members, unknown sheet names or one sheet name in common
+        unknown_sheets = sum(1 for k in readable if packages[k][1] is None)
+        sheet_counts = Counter(name for k in readable if packages[k][1] is not None
+                               for name in packages[k][1])
+        unmatched = set()
+        for k in readable:
+            signature, sheets = packages[k]
+            if sheets is None:
+                if r < 2:
+                    unmatched.add(k)
+            elif (not unknown_sheets and signatures[signature] < 2
+                  and all(sheet_counts[name] < 2 for name in sheets)):
+                unmatched.add(k)
+        self.files.update(paths[k] for k in unmatched)
+        self.files_not_parsed.update(paths[k] for k in unmatched)
+        
+        def rejected(a, b):
+            package1, package2 = packages[a], packages[b]
+            if (package1 is None or package2 is None or package1[0] == package2[0]
+                    or package1[1] is None or package2[1] is None or package1[1] & package2[1]):
+                return False
+            self.counters['no_common_sheets'] += 1
+            return True
+        return rejected, unmatched
+
+    def skip(self, files_to_read):
+        """
+        Files that don't need parsing
+        Returns dict: filepath -> first file with identical members (whose
+        content it shares), or None for unreadable files (content None)
+        """
+        first_of = {}
+        skipped = {}
+        for filepath, file_type in files_to_read.items():
+            package = self.package(filepath, file_type)
+            self.files.add(filepath)
+            if package is None:
+                skipped[filepath] = None
+                continue
+            key = (file_type, package[0])
+            if key in first_of:
+                skipped[filepath] = first_of[key]
+            else:
+                first_of[key] = filepath
+        self.files_not_parsed.update(skipped)
+        return skipped
+
+    def summary(self):
+        c = self.counters
+        return (f"Prefilter: {c['pairs']} pairs, {c['unreadable']} unreadable, "
+                f"{c['no_common_sheets']} without common sheets, {c['identical']} identical; "
+                f"{len(self.files_not_parsed)} of {len(self.files)} files not parsed")
+
+def read_package(filepath, file_type):
+    """
+    Read the ZIP central directory of an Office file
+    Returns (member signature, sheet names or None) or None if it is not a readable package
+    """
+    try:
+        with zipfile.ZipFile(filepath) as zf:
+            infos = zf.infolist()
+            if not any(info.filename == "[Content_Types].xml" for info in infos):
+                return None
+            # docProps holds author, timestamps and counts - not content
+            signature = tuple(sorted((info.filename, info.CRC, info.file_size) for info in infos
+                                     if not info.filename.startswith("docProps/")))
+            sheets = excel_sheet_names(zf) if file_type == 'excel' else None
+            return signature, sheets
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+def excel_sheet_names(zf):
+    """Sheet names from xl/workbook.xml, None if they can't be read cheaply"""
+    try:
+        with zf.open("xl/workbook.xml") as f:
+            root = ET.parse(f).getroot()
+    except (KeyError, ET.ParseError):
+        return None
+    # Match on the local name: transitional and strict files use different namespaces
+    names = frozenset(element.get("name") for element in root.iter()
+                      if element.tag.rsplit("}", 1)[-1] == "sheet")
+    return names or None
+
+def compare_files_batch(comparisons, cache=None, tfidf_mode='corpus', pool=None, options=None,
+                        prefilter=None, stats=None):
     """
     Compare multiple file pairs at once - PARALLEL VERSION
+    If an ExtractionCache is given, unchanged files are not parsed again.
+    tfidf_mode: 'corpus' fits one TF-IDF model per file type over all documents,
+                'pair' fits a separate model for every pair (slow, old behaviour)
+    prefilter: optional Prefilter that rejects pairs before any file is parsed
+    stats: optional Stats that collects timings and counters
     """
     # Step 1: Collect all unique files that need to be read
+    rejected = prefilter.reject(comparisons) if prefilter is not None else set()
+    files_to_read = collect_files(comp for i, comp in enumerate(comparisons) if i not in rejected)
+    
+    # Step 2: Read all files (cache first, then in PARALLEL)
+    file_cache = load_files(files_to_read, cache, pool, options, prefilter, stats)
+    
+    # Step 3: Compare using cached data (super fast!)
+    return score_comparisons(comparisons, file_cache, tfidf_mode, rejected, stats)
+
+def collect_files(comparisons):
+    """Return dict of filepath -> file type for every file used by the comparisons"""
     files_to_read = {}
     for comp in comparisons:
         file_type = comp['type']
@@ -165,18 +1500,29 @@ def compare_files_batch(comparisons):
             files_to_read[file1] = file_type
         if file2 not in files_to_read:
             files_to_read[file2] = file_type
+    return files_to_read
+
+def score_comparisons(comparisons, file_cache, tfidf_mode='corpus', rejected=(), stats=None):
+    """
+    Score comparisons whose files are already loaded into file_cache
+    Comparisons in rejected (indices) score 0 and need no loaded files
+    Returns dict: str(comparison index) -> {'similar': bool, 'score': float}
+    """
+    return {str(i): result for i, result in iter_scores(comparisons, file_cache, tfidf_mode, rejected, stats)}
+
+def iter_scores(comparisons, file_cache, tfidf_mode='corpus', rejected=(), stats=None):
+    """Yield (comparison index, result) as soon as each comparison is scored"""
+    if rejected:
+        kept = [comp for i, comp in enumerate(comparisons) if i not in rejected]
+        scores = iter_scores(kept, file_cache, tfidf_mode, stats=stats)
+        for i in range(len(comparisons)):
+            yield i, ({'similar': False, 'score': 0.0} if i in rejected else next(scores)[1])
+        return
     
-    # Step 2: Read all files in PARALLEL (this is the slow part!)
-    cpu_count = max(1, os.cpu_count() - 1)  # Leave 1 core free
-    with Pool(processes=cpu_count) as pool:
-        file_list = list(files_to_read.items())
-        loaded_data = pool.starmap(load_file, file_list)
-    
-    # Create dictionary: filepath -> content
-    file_cache = dict(zip(files_to_read.keys(), loaded_data))
-    
-    # Step 3: Compare using cached data (super fast!)
-    results = {}
+    text_scores = {}
+    if tfidf_mode == 'corpus':
+        with timed(stats, 'tfidf'):
+            text_scores = score_text_pairs_corpus(comparisons, file_cache)
     
     for i, comp in enumerate(comparisons):
         file_type = comp['type']
@@ -191,59 +1537,1051 @@ def compare_files_batch(comparisons):
             if data1 is None or data2 is None:
                 similarity = 0.0
             else:
-                similarity = compare_excel_fast(data1, data2)
-            similar = similarity > 0.7
-            results[str(i)] = {'similar': similar, 'score': similarity if similar else 0.0}
+                with timed(stats, 'excel'):
+                    similarity = compare_excel_fast(data1, data2, EXCEL_SIMILARITY_THRESHOLD)
+            similar = similarity > EXCEL_SIMILARITY_THRESHOLD
         
-        # Handle Word files
-        elif file_type == 'word':
+        # Handle Word and PowerPoint files
+        elif file_type in ('word', 'powerpoint'):
             if data1 is None or data2 is None:
-                results[str(i)] = {'similar': False, 'score': 0.0}
+                similarity = 0.0
+            elif i in text_scores:
+                similarity = text_scores[i]
             else:
-                similarity = calculate_text_similarity(data1, data2)
-                similar = similarity > 0.6
-                results[str(i)] = {'similar': similar, 'score': similarity if similar else 0.0}
-                
-        # Handle PowerPoint files
-        elif file_type == 'powerpoint':
+                with timed(stats, 'tfidf'):
+                    similarity = calculate_text_similarity(data1, data2)
+            similar = similarity > TEXT_SIMILARITY_THRESHOLD
+        
+        else:
+            continue
+        
+        if stats is not None:
+            stats.add_pairs(file_type, 1, int(similar))
+        yield i, {'similar': similar, 'score': similarity if similar else 0.0}
+
+
+# ================== STREAMING (NDJSON) ==================
+DEFAULT_STREAM_CHUNK = 1000
+PROGRESS_INTERVAL = 200
+
+def report_progress(done, stream=None, **extra):
+    """Write a progress record to stderr (one JSON object per line)"""
+    record = {'progress': done}
+    record.update(extra)
+    stream = stream or sys.stderr
+    stream.write(json.dumps(record) + "\n")
+    stream.flush()
+
+def stream_compare(input_stream, output_stream, cache=None, tfidf_mode='corpus',
+                   chunk_size=DEFAULT_STREAM_CHUNK, pool=None, progress_stream=None, options=None,
+                   prefilter=None, stats=None):
+    """
+    Streaming NDJSON mode
+    Input:  one comparison per line {"type": ..., "file1": ..., "file2": ...}
+    Output: one line per comparison {"index": n, "similar": ..., "score": ...},
+            written as soon as it is scored, plus progress records on stderr
+    Comparisons are handled in chunks of chunk_size, so only the files of
+    the current chunk are held in memory.
+    """
+    done = 0
+    chunk = []
+    
+    def run_chunk(chunk, first_index):
+        rejected = prefilter.reject(chunk) if prefilter is not None else set()
+        kept = (comp for i, comp in enumerate(chunk) if i not in rejected)
+        file_cache = load_files(collect_files(kept), cache, pool, options, prefilter, stats)
+        report_progress(first_index, progress_stream, files_loaded=len(file_cache))
+        
+        scored = first_index
+        for i, result in iter_scores(chunk, file_cache, tfidf_mode, rejected, stats):
+            result = {'index': first_index + i, 'similar': result['similar'], 'score': result['score']}
+            output_stream.write(json.dumps(result) + "\n")
+            scored += 1
+            if scored % PROGRESS_INTERVAL == 0:
+                output_stream.flush()
+                report_progress(scored, progress_stream)
+        output_stream.flush()
+        return scored
+    
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(json.loads(line))
+        if len(chunk) >= chunk_size:
+            done = run_chunk(chunk, done)
+            chunk = []
+    
+    if chunk:
+        done = run_chunk(chunk, done)
+    report_progress(done, progress_stream, finished=True)
+    return done
+
+
+# ================== GROUP INPUT ==================
+def compare_groups(groups, output_stream, cache=None, tfidf_mode='corpus', pool=None,
+                   progress_stream=None, options=None, prefilter=None, stats=None):
+    """
+    Compact input: every file is sent once and all pairs within a group are compared
+    groups = [{"type": "word", "files": [{"id": 0, "path": "..."}, ...]}, ...]
+    Type "text" groups (.txt/.csv/.pdf) use the plain-text Jaccard engine
+    Output: one NDJSON line {"id1", "id2", "similar", "score"} per SIMILAR pair,
+            progress records on stderr, the last one with "finished": true
+            (pairs without a line were compared and are not similar)
+    Returns the number of pairs compared
+    """
+    options = options or LoadOptions()
+    done = 0
+    for group in groups:
+        file_type = group['type']
+        ids = [f['id'] for f in group['files']]
+        paths = [f['path'] for f in group['files']]
+        
+        if file_type == 'text':
+            rows = iter_plain_text_rows(paths, options.text_lines, stats)
+        else:
+            rejected, unmatched = (prefilter.reject_group(paths, file_type) if prefilter is not None
+                                   else (None, set()))
+            files_to_read = {path: file_type for k, path in enumerate(paths) if k not in unmatched}
+            file_cache = load_files(files_to_read, cache, pool, options, prefilter, stats)
+            contents = [file_cache.get(path) for path in paths]
+            report_progress(done, progress_stream, files_loaded=len(file_cache))
+            rows = iter_group_rows(file_type, contents, tfidf_mode, stats, rejected)
+        
+        for a, scores in rows:
+            for b, similarity in scores:
+                result = {'id1': ids[a], 'id2': ids[b], 'similar': True, 'score': similarity}
+                output_stream.write(json.dumps(result) + "\n")
+            
+            previous = done
+            done += len(paths) - a - 1
+            if done // PROGRESS_INTERVAL > previous // PROGRESS_INTERVAL:
+                output_stream.flush()
+                report_progress(done, progress_stream)
+    
+    output_stream.flush()
+    report_progress(done, progress_stream, finished=True)
+    return done
+
+def iter_group_rows(file_type, contents, tfidf_mode='corpus', stats=None, rejected=None):
+    """
+    All-pairs scoring of one group, row by row
+    Yields (a, [(b, score), ...]) with the similar b > a for every file a
+    Same scores and thresholds as iter_scores on the equivalent pair list
+    rejected = optional rejected(a, b) of Prefilter.reject_group, those pairs score 0
+    """
+    import numpy as np
+    
+    if file_type in ('word', 'powerpoint') and tfidf_mode == 'corpus':
+        # One fit over the group, then each row against all later rows at once
+        rows = [k for k, text in enumerate(contents) if text]
+        row_of = {k: r for r, k in enumerate(rows)}
+        with timed(stats, 'tfidf'):
+            matrix = fit_tfidf([contents[k] for k in rows]) if rows else None
+        
+        for a in range(len(contents)):
+            similar = []
+            if matrix is not None and a in row_of:
+                r = row_of[a]
+                with timed(stats, 'tfidf'):
+                    similarities = np.asarray((matrix[r + 1:] @ matrix[r].T).todense()).ravel()
+                similar = [(rows[r + 1 + k], float(similarities[k]))
+                           for k in np.flatnonzero(similarities > TEXT_SIMILARITY_THRESHOLD)]
+            if stats is not None:
+                stats.add_pairs(file_type, len(contents) - a - 1, len(similar))
+            yield a, similar
+        return
+    
+    for a in range(len(contents)):
+        similar = []
+        for b in range(a + 1, len(contents)):
+            if rejected is not None and rejected(a, b):
+                continue
+            data1, data2 = contents[a], contents[b]
             if data1 is None or data2 is None:
-                results[str(i)] = {'similar': False, 'score': 0.0}
-            else:
-                similarity = calculate_text_similarity(data1, data2)
-                similar = similarity > 0.6
-                results[str(i)] = {'similar': similar, 'score': similarity if similar else 0.0}
+                continue
+            if file_type == 'excel':
+                with timed(stats, 'excel'):
+                    similarity = compare_excel_fast(data1, data2, EXCEL_SIMILARITY_THRESHOLD)
+                if similarity > EXCEL_SIMILARITY_THRESHOLD:
+                    similar.append((b, similarity))
+            elif file_type in ('word', 'powerpoint'):
+                with timed(stats, 'tfidf'):
+                    similarity = calculate_text_similarity(data1, data2)
+                if similarity > TEXT_SIMILARITY_THRESHOLD:
+                    similar.append((b, similarity))
+        if stats is not None:
+            stats.add_pairs(file_type, len(contents) - a - 1, len(similar))
+        yield a, similar
+
+
+# ================== PLAIN TEXT (JACCARD) ==================
+# Same rules as SimilarityFinder::areDocumentsSimilar in the C++ core:
+# word-set Jaccard of the first lines (DEFAULT_TEXT_LINES), size ratio checked first
+PLAIN_TEXT_THRESHOLD = 0.6
+PLAIN_TEXT_MIN_SIZE_RATIO = 0.3
+TEXT_READ_CHUNK = 64 * 1024
+MAX_WORD_BYTES = 64 * 1024
+TEXT_BLOCK_PAIRS = 4_000_000  # candidate pairs per sparse product (bounds its memory)
+NOT_ALNUM = bytes(c for c in range(256) if c >= 128 or not chr(c).isalnum())
+
+def add_plain_words(words, tokens):
+    for token in tokens:
+        word = token.translate(None, NOT_ALNUM).lower()
+        if len(word) > 2:
+            words.add(word)
+
+def plain_text_words(filepath, max_lines=DEFAULT_TEXT_LINES):
+    """
+    Distinct words in the first max_lines lines of a file, tokenized like
+    the C++ extractWords: split at whitespace, keep only ASCII letters and
+    digits, lower-case, drop words of 2 bytes or less
+    The file is read in chunks, so memory does not grow with line length
+    (only a word longer than MAX_WORD_BYTES is cut).
+    Returns a set of bytes (empty if the file can't be read)
+    """
+    words = set()
+    try:
+        with open(filepath, "rb") as f:
+            lines = 0
+            tail = b""  # unfinished word at the end of the previous chunk
+            while lines < max_lines:
+                chunk = f.read(TEXT_READ_CHUNK)
+                if not chunk:
+                    break
+                newlines = chunk.count(b"\n")
+                if lines + newlines >= max_lines:
+                    # Cut after the newline that ends the last wanted line
+                    cut = -1
+                    for _ in range(max_lines - lines):
+                        cut = chunk.index(b"\n", cut + 1)
+                    chunk = chunk[:cut + 1]
+                    newlines = max_lines - lines
+                lines += newlines
                 
+                data = tail + chunk
+                tokens = data.split()
+                tail = b""
+                if tokens and not data[-1:].isspace():
+                    tail = tokens.pop()[:MAX_WORD_BYTES]
+                add_plain_words(words, tokens)
+            add_plain_words(words, [tail])
+    except OSError:
+        return set()
+    return words
+
+def iter_plain_text_rows(paths, max_lines=DEFAULT_TEXT_LINES, stats=None):
+    """
+    All-pairs Jaccard of plain-text files, row by row (like iter_group_rows)
+    Every file is read and tokenized once into a sparse binary file x word
+    matrix; the common words of a block of rows with all later rows come
+    from one sparse product. A pair is similar if the smaller file is at
+    least PLAIN_TEXT_MIN_SIZE_RATIO of the larger one and the Jaccard index
+    of the word sets is above PLAIN_TEXT_THRESHOLD.
+    Yields (a, [(b, score), ...]) with the similar b > a for every file a
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    
+    with timed(stats, 'text'):
+        vocabulary = {}
+        indices = array('i')
+        indptr = array('q', [0])
+        for filepath in paths:
+            indices.extend(vocabulary.setdefault(word, len(vocabulary))
+                           for word in plain_text_words(filepath, max_lines))
+            indptr.append(len(indices))
+        
+        n = len(paths)
+        matrix = csr_matrix((np.ones(len(indices), dtype=np.int32), np.frombuffer(indices, dtype=np.int32),
+                             np.frombuffer(indptr, dtype=np.int64)), shape=(n, max(1, len(vocabulary))))
+        word_counts = np.diff(np.frombuffer(indptr, dtype=np.int64))
+        sizes = np.array([file_size(filepath) for filepath in paths], dtype=np.float64)
+    
+    block_rows = max(1, TEXT_BLOCK_PAIRS // max(1, n))
+    for start in range(0, n, block_rows):
+        stop = min(n, start + block_rows)
+        with timed(stats, 'text'):
+            # Rows start..stop against columns start..n (only b > a is needed)
+            common = (matrix[start:stop] @ matrix[start:].T).tocoo()
+            rows = common.row + start
+            cols = common.col + start
+            keep = cols > rows
+            rows, cols, shared = rows[keep], cols[keep], common.data[keep].astype(np.int64)
+            
+            jaccard = shared / (word_counts[rows] + word_counts[cols] - shared)
+            larger = np.maximum(sizes[rows], sizes[cols])
+            ratio = np.minimum(sizes[rows], sizes[cols]) / np.maximum(larger, 1)
+            similar = (jaccard > PLAIN_TEXT_THRESHOLD) & (ratio >= PLAIN_TEXT_MIN_SIZE_RATIO)
+            
+            similar_of = {}
+            for a, b, score in zip(rows[similar].tolist(), cols[similar].tolist(), jaccard[similar].tolist()):
+                similar_of.setdefault(a, []).append((b, score))
+        
+        for a in range(start, stop):
+            similar_pairs = sorted(similar_of.get(a, []))
+            if stats is not None:
+                stats.add_pairs('text', n - a - 1, len(similar_pairs))
+            yield a, similar_pairs
+
+
+# ================== BOUNDED-MEMORY EVALUATION ==================
+DEFAULT_TILE_SIZE = 64
+
+def content_size(data):
+    """Approximate bytes held by one loaded file (text or hashed Excel sheets)"""
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        return sys.getsizeof(data)
+    if isinstance(data, HashedTerms):
+        return sys.getsizeof(data.indices) + sys.getsizeof(data.counts)
+    size = sys.getsizeof(data)
+    for sheet_name, arrays in data.items():
+        size += sys.getsizeof(sheet_name) + sum(arr.nbytes for arr in arrays.values())
+    return size
+
+def tiled_order(comparisons, tile_size=DEFAULT_TILE_SIZE):
+    """
+    Group comparison indices by tile for locality
+    Files are numbered in order of first use; pair (i, j) belongs to tile
+    (i // tile_size, j // tile_size). Tiles are visited row by row, every
+    other row backwards, so the files of the last tile are still loaded
+    when the next row starts.
+    Returns list of lists of comparison indices, one list per tile
+    """
+    file_index = {}
+    for comp in comparisons:
+        file_index.setdefault(comp['file1'], len(file_index))
+        file_index.setdefault(comp['file2'], len(file_index))
+    
+    tiles = {}
+    for i, comp in enumerate(comparisons):
+        low, high = sorted((file_index[comp['file1']], file_index[comp['file2']]))
+        tiles.setdefault((low // tile_size, high // tile_size), []).append(i)
+    
+    def visit_order(tile):
+        row, column = tile
+        return (row, column if row % 2 == 0 else -column)
     
-    return results
+    return [tiles[tile] for tile in sorted(tiles, key=visit_order)]
+
+class WorkingSet:
+    """
+    Loaded file contents kept in LRU order within a byte budget
+    Files are dropped as soon as no remaining comparison needs them; the
+    least recently used ones are dropped earlier when over budget.
+    """
+
+    def __init__(self, max_bytes, uses):
+        self.max_bytes = max_bytes
+        self.uses = uses  # filepath -> number of comparisons not scored yet
+        self.entries = OrderedDict()  # filepath -> (content, size)
+        self.bytes = 0
+        self.peak_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def missing(self, filepaths):
+        return [f for f in filepaths if f not in self.entries]
+
+    def get(self, filepath):
+        self.entries.move_to_end(filepath)
+        return self.entries[filepath][0]
+
+    def put(self, filepath, data):
+        size = content_size(data)
+        self.entries[filepath] = (data, size)
+        self.bytes += size
+        self.loads += 1
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def done(self, filepath):
+        """One comparison using filepath was scored"""
+        self.uses[filepath] -= 1
+        if self.uses[filepath] == 0 and filepath in self.entries:
+            self._drop(filepath)
 
+    def trim(self):
+        """Evict least recently used files until the budget is met"""
+        while self.bytes > self.max_bytes and self.entries:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
 
-def load_file(filepath, file_type):
+    def _drop(self, filepath):
+        _, size = self.entries.pop(filepath)
+        self.bytes -= size
+
+    def summary(self, files):
+        mb = 1024 * 1024
+        text = (f"Working set: {self.loads} loads for {files} files, {self.evictions} evicted, "
+                f"peak {self.peak_bytes / mb:.1f} MB of {self.max_bytes / mb:.0f} MB budget")
+        rss = peak_rss_bytes()
+        if rss is not None:
+            text += f", peak RSS {rss / mb:.1f} MB"
+        return text
+
+def compare_files_bounded(comparisons, memory_bytes, cache=None, tfidf_mode='corpus', pool=None,
+                          options=None, tile_size=DEFAULT_TILE_SIZE, report_stream=None, prefilter=None,
+                          stats=None):
+    """
+    Like compare_files_batch, but never holds more loaded content than
+    memory_bytes (plus the files of the tile being scored)
+    Comparisons are scored tile by tile (see tiled_order), loading only the
+    files the tile is missing. Corpus TF-IDF is fitted per tile.
+    Returns dict: str(comparison index) -> {'similar': bool, 'score': float}
+    """
+    rejected = prefilter.reject(comparisons) if prefilter is not None else set()
+    results = {i: {'similar': False, 'score': 0.0} for i in rejected}
+    kept = [i for i in range(len(comparisons)) if i not in rejected]
+    kept_comparisons = [comparisons[i] for i in kept]
+    
+    files = collect_files(kept_comparisons)
+    uses = dict.fromkeys(files, 0)
+    for comp in kept_comparisons:
+        uses[comp['file1']] += 1
+        uses[comp['file2']] += 1
+    working_set = WorkingSet(memory_bytes, uses)
+    options = options or LoadOptions()
+    own_pool = None  # started on the first miss, shared by all tiles
+    
+    try:
+        for tile in tiled_order(kept_comparisons, tile_size):
+            tile_comparisons = [kept_comparisons[i] for i in tile]
+            tile_files = collect_files(tile_comparisons)
+            
+            missing = working_set.missing(tile_files)
+            if missing:
+                if pool is None and own_pool is None:
+                    own_pool = options.create_pool()
+                loaded = load_files({f: tile_files[f] for f in missing}, cache,
+                                    pool or own_pool, options, prefilter, stats)
+                for filepath in missing:
+                    working_set.put(filepath, loaded[filepath])
+            
+            file_cache = {filepath: working_set.get(filepath) for filepath in tile_files}
+            for i, result in iter_scores(tile_comparisons, file_cache, tfidf_mode, stats=stats):
+                results[kept[tile[i]]] = result
+                working_set.done(tile_comparisons[i]['file1'])
+                working_set.done(tile_comparisons[i]['file2'])
+            working_set.trim()
+    finally:
+        if own_pool is not None:
+            own_pool.terminate()
+    
+    stream = report_stream or sys.stderr
+    stream.write(working_set.summary(len(files)) + "\n")
+    return {str(i): results[i] for i in range(len(comparisons))}
+
+
+# ================== MINHASH / LSH CANDIDATES ==================
+MINHASH_SEED = 42
+DEFAULT_NUM_PERM = 128
+DEFAULT_LSH_THRESHOLD = 0.3
+DEFAULT_SHINGLE_SIZE = 2
+
+# Same tokens TfidfVectorizer uses, so candidates and scores agree on what a word is
+WORD_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+def shingle_hashes(text, shingle_size=DEFAULT_SHINGLE_SIZE):
+    """Hash the word shingles of a document (32-bit values in a uint64 array)"""
+    import numpy as np
+    if isinstance(text, HashedTerms):
+        # No word order left: the hashed words themselves are the shingles
+        return np.frombuffer(text.indices, dtype=np.uint32).astype(np.uint64)
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[k:k + shingle_size]) for k in range(len(words) - shingle_size + 1)}
+    
+    return np.fromiter((zlib.crc32(sh.encode("utf-8", "ignore")) for sh in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+def minhash_coefficients(num_perm=DEFAULT_NUM_PERM, seed=MINHASH_SEED):
+    """Random (a, b) pairs for num_perm hash permutations (a is odd)"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    coeff_a = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    coeff_b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return coeff_a, coeff_b
+
+def minhash_signature(hashes, coeff_a, coeff_b):
+    """
+    MinHash signature: minimum of every permutation (a*x + b) >> 32 over all shingles
+    Processed in blocks so huge documents don't allocate shingles x num_perm at once
+    """
+    import numpy as np
+    signature = np.full(len(coeff_a), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), 4096):
+        block = hashes[start:start + 4096, None]
+        permuted = (block * coeff_a + coeff_b) >> np.uint64(32)  # wraps mod 2^64
+        np.minimum(signature, permuted.min(axis=0), out=signature)
+    return signature
+
+def choose_lsh_bands(num_perm, threshold):
+    """
+    Pick (bands, rows) whose LSH S-curve threshold (1/bands)^(1/rows)
+    is closest to the requested Jaccard threshold.
+    Lower threshold = more candidates (recall), higher = fewer (speed/precision)
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+def lsh_candidate_pairs(signatures, bands, rows):
+    """Return sorted (i, j) index pairs that share at least one LSH bucket"""
+    candidates = set()
+    for band in range(bands):
+        buckets = {}
+        for doc, signature in enumerate(signatures):
+            key = signature[band * rows:(band + 1) * rows].tobytes()
+            buckets.setdefault(key, []).append(doc)
+        
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    candidates.add((members[a], members[b]))
+    
+    return sorted(candidates)
+
+def find_similar_files(files, cache=None, tfidf_mode='corpus', lsh_threshold=DEFAULT_LSH_THRESHOLD,
+                       num_perm=DEFAULT_NUM_PERM, bands=None, shingle_size=DEFAULT_SHINGLE_SIZE,
+                       pool=None, options=None, prefilter=None, stats=None):
+    """
+    Find similar files from a list of files instead of a list of pairs
+    files = list of {'path': ..., 'type': ...}
+    Word/PowerPoint pairs come from MinHash/LSH candidates, Excel is still all-pairs.
+    Returns list of {'type', 'file1', 'file2', 'score'} for similar pairs only
+    """
+    files_to_read = {}
+    for f in files:
+        if f['path'] not in files_to_read:
+            files_to_read[f['path']] = f['type']
+    
+    file_cache = load_files(files_to_read, cache, pool, options, prefilter, stats)
+    
+    if bands is None:
+        bands, rows = choose_lsh_bands(num_perm, lsh_threshold)
+    else:
+        bands = max(1, min(bands, num_perm))
+        rows = num_perm // bands
+    coeff_a, coeff_b = minhash_coefficients(num_perm)
+    
+    paths_by_type = {}
+    for filepath, file_type in files_to_read.items():
+        if file_cache[filepath]:
+            paths_by_type.setdefault(file_type, []).append(filepath)
+    
+    comparisons = []
+    for file_type, paths in paths_by_type.items():
+        if file_type == 'excel':
+            for a in range(len(paths)):
+                for b in range(a + 1, len(paths)):
+                    comparisons.append({'type': file_type, 'file1': paths[a], 'file2': paths[b]})
+        
+        elif file_type in ('word', 'powerpoint'):
+            signed_paths = []
+            signatures = []
+            with timed(stats, 'minhash'):
+                for filepath in paths:
+                    hashes = shingle_hashes(file_cache[filepath], shingle_size)
+                    if len(hashes):
+                        signed_paths.append(filepath)
+                        signatures.append(minhash_signature(hashes, coeff_a, coeff_b))
+                candidates = lsh_candidate_pairs(signatures, bands, rows)
+            
+            for a, b in candidates:
+                comparisons.append({'type': file_type, 'file1': signed_paths[a], 'file2': signed_paths[b]})
+    
+    results = score_comparisons(comparisons, file_cache, tfidf_mode, stats=stats)
+    
+    similar_pairs = []
+    for i, comp in enumerate(comparisons):
+        result = results[str(i)]
+        if result['similar']:
+            similar_pairs.append({'type': comp['type'], 'file1': comp['file1'],
+                                  'file2': comp['file2'], 'score': result['score']})
+    return similar_pairs
+
+
+def load_file(filepath, file_type, max_chars=None, text_features='text'):
     """
     Load a single file - this runs in parallel!
+    max_chars optionally caps the extracted text of Word/PowerPoint files
+    text_features='hashed' returns Word/PowerPoint files as HashedTerms
     """
     try:
         if file_type == 'excel':
             return load_excel_fast(filepath)
-        elif file_type == 'word':
-            return extract_word_text(filepath)
-        elif file_type == 'powerpoint':
-            return extract_powerpoint_text(filepath)
+        elif file_type in ('word', 'powerpoint'):
+            if file_type == 'word':
+                text = extract_word_text(filepath, max_chars)
+            else:
+                text = extract_powerpoint_text(filepath, max_chars)
+            if text_features == 'hashed':
+                return hash_terms(text)
+            return text
     except Exception as e:
         print(f"Error loading {filepath}: {e}", file=sys.stderr)
         return None
 
 
-if __name__ == "__main__":
+# ================== DAEMON ==================
+DAEMON_DIR = os.path.join(os.path.expanduser("~"), ".office_comparer")
+DAEMON_KEY_PATH = os.path.join(DAEMON_DIR, "daemon.key")
+DEFAULT_DAEMON_MEMORY_MB = 1024
+# Fixed by the daemon's shared cache and worker pool: a request that sets
+# them to other values runs in its own process instead
+DAEMON_FIXED_OPTIONS = ("cache", "cache_size_mb", "workers", "max_tasks_per_child")
+
+def daemon_address():
+    """Named pipe on Windows, Unix domain socket elsewhere"""
+    if os.name == 'nt':
+        user = os.environ.get("USERNAME", "user")
+        return r"\\.\pipe\office_comparer_" + user, 'AF_PIPE'
+    return os.path.join(DAEMON_DIR, "daemon.sock"), 'AF_UNIX'
+
+class ConnectionInput:
+    """File-like stdin of a daemon request, fed by the client in batches of lines"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.finished = False
+
+    def __iter__(self):
+        while not self.finished:
+            lines = self.conn.recv()
+            if lines is None:
+                self.finished = True
+                return
+            yield from lines
+
+    def read(self):
+        return "".join(self)
+
+class ConnectionOutput:
+    """File-like stdout/stderr of a daemon request, forwarded to the client"""
+
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self.buffer = []
+
+    def write(self, text):
+        self.buffer.append(text)
+        if self.name == 'stderr':
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.conn.send((self.name, "".join(self.buffer)))
+            self.buffer = []
+
+def serve_daemon(args):
+    """
+    Long-lived comparer: keeps the worker Pool, imported parsers and an
+    in-memory extraction cache warm and serves batch requests one at a time.
+    Clients are normal `office_comparer_batch.py` invocations (see run_client).
+    Returns the exit code
+    """
+    from multiprocessing.connection import Listener
+    
+    # Replacing the socket and key of a live daemon would orphan it
+    if run_client('ping') is not None:
+        print("An office comparer daemon is already running (stop it with --stop-daemon)",
+              file=sys.stderr)
+        return 1
+    
+    os.makedirs(DAEMON_DIR, exist_ok=True)
+    # Compared with the options of every request (see daemon_conflicts)
+    args.cache = os.path.abspath(args.cache)
+    args.workers = args.workers or default_worker_count()
+    address, family = daemon_address()
+    if family == 'AF_UNIX' and os.path.exists(address):
+        os.remove(address)  # stale socket from a daemon that was killed
+    
+    # Random per-daemon key, readable only by this user: the connection
+    # carries pickled objects, so other users must not be able to connect
+    authkey = os.urandom(32)
+    fd = os.open(DAEMON_KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    
+    cache = ExtractionCache(None if args.no_cache else args.cache,
+                            int(args.cache_size_mb * 1024 * 1024),
+                            memory_bytes=int(args.daemon_memory_mb * 1024 * 1024))
+    parser = build_parser()
+    
+    print(f"Office comparer daemon listening on {address}", file=sys.stderr, flush=True)
+    with load_options(args).create_pool() as pool, \
+            Listener(address, family=family, authkey=authkey) as listener:
+        if family == 'AF_UNIX':
+            os.chmod(address, 0o600)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Daemon: rejected connection: {e}", file=sys.stderr)
+                    continue
+                
+                with conn:
+                    try:
+                        message = conn.recv()
+                        if message == 'shutdown':
+                            conn.send(('exit', 0))
+                            break
+                        if message == 'ping':
+                            conn.send(('exit', 0))
+                            continue
+                        client_cwd, client_argv = message
+                        serve_request(conn, parser, client_cwd, client_argv, cache, pool, args)
+                    except (EOFError, OSError):
+                        pass  # client went away (e.g. cancelled scan)
+        finally:
+            cache.close()
+            try:
+                os.remove(DAEMON_KEY_PATH)
+            except OSError:
+                pass
+    return 0
+
+def daemon_conflicts(parser, request_args, daemon_args):
+    """Options the request sets to other values than the daemon's cache and pool use"""
+    conflicts = []
+    for dest in DAEMON_FIXED_OPTIONS:
+        if request_args.no_cache and dest.startswith("cache"):
+            continue
+        value = getattr(request_args, dest)
+        if dest == "cache":
+            value = os.path.abspath(value)
+        if value != parser.get_default(dest) and value != getattr(daemon_args, dest):
+            conflicts.append("--" + dest.replace("_", "-"))
+    return conflicts
+
+def serve_request(conn, parser, client_cwd, client_argv, cache, pool, daemon_args):
+    """
+    Run one client request inside the daemon
+    Requests are served one at a time in the client's working directory, so
+    relative input paths, --profile and --quarantine mean what they mean
+    for the client. A request that needs another cache or pool than the
+    daemon's is sent back ('fallback') before the client sends its input.
+    """
+    stdout = ConnectionOutput(conn, 'stdout')
+    stderr = ConnectionOutput(conn, 'stderr')
+    cache.reset_counters()
+    daemon_cwd = os.getcwd()
+    try:
+        os.chdir(client_cwd)
+    except OSError as e:
+        conn.send(('fallback', f"cannot enter {client_cwd}: {e}"))
+        return
+    try:
+        args = parser.parse_args(client_argv)
+        conflicts = daemon_conflicts(parser, args, daemon_args)
+        if conflicts:
+            conn.send(('fallback', f"other values than the daemon's for {', '.join(conflicts)}"))
+            return
+        conn.send(('accept', None))
+        exit_code = run_request(args, ConnectionInput(conn), stdout, stderr,
+                                None if args.no_cache else cache, pool)
+    except SystemExit as e:  # argparse errors
+        exit_code = e.code or 0
+    finally:
+        os.chdir(daemon_cwd)
+    stdout.flush()
+    stderr.flush()
+    conn.send(('exit', exit_code))
+
+def run_client(argv):
+    """
+    Forward this invocation to a running daemon, together with the working
+    directory (argv can also be one of the control messages 'shutdown' and 'ping')
+    Returns the exit code, or None if no daemon is running or it cannot serve
+    the request (then nothing was read from stdin)
+    """
+    from multiprocessing.connection import Client
+    import threading
+    
+    address, family = daemon_address()
+    try:
+        with open(DAEMON_KEY_PATH, "rb") as f:
+            authkey = f.read()
+        conn = Client(address, family=family, authkey=authkey)
+    except Exception:
+        return None
+    
+    with conn:
+        if isinstance(argv, str):
+            conn.send(argv)
+            return conn.recv()[1]
+        conn.send((os.getcwd(), argv))
+        kind, payload = conn.recv()
+        if kind == 'fallback':
+            print(f"Office comparer daemon not used: {payload}", file=sys.stderr)
+            return None
+        if kind == 'exit':
+            return payload
+        
+        def send_stdin():
+            # Separate thread, so results can be read while input is still sent
+            try:
+                batch = []
+                for line in sys.stdin:
+                    batch.append(line)
+                    if len(batch) >= 1000:
+                        conn.send(batch)
+                        batch = []
+                if batch:
+                    conn.send(batch)
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+        
+        sender = threading.Thread(target=send_stdin, daemon=True)
+        sender.start()
+        
+        while True:
+            kind, payload = conn.recv()
+            if kind == 'exit':
+                return payload
+            stream = sys.stdout if kind == 'stdout' else sys.stderr
+            stream.write(payload)
+            stream.flush()
+
+
+def open_cache(args):
+    """Open the extraction cache, or return None if disabled/unavailable"""
+    if args.no_cache:
+        return None
+    try:
+        return ExtractionCache(args.cache, int(args.cache_size_mb * 1024 * 1024))
+    except Exception as e:
+        print(f"Extraction cache disabled ({args.cache}): {e}", file=sys.stderr)
+        return None
+
+
+def load_options(args, profile_prefix=None):
+    return LoadOptions(workers=args.workers,
+                       max_inflight_bytes=int(args.max_inflight_mb * 1024 * 1024),
+                       max_tasks_per_child=args.max_tasks_per_child,
+                       max_chars=args.max_chars,
+                       shared_memory=not args.no_shared_memory,
+                       text_features=args.text_features,
+                       profile_prefix=profile_prefix,
+                       file_timeout=args.file_timeout or None,
+                       file_memory_bytes=int((args.file_memory_mb or 0) * 1024 * 1024) or None,
+                       quarantine=None if args.no_quarantine else Quarantine(args.quarantine),
+                       text_lines=args.text_lines)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch similarity comparison for Office files")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help="path of the persistent extraction cache")
+    parser.add_argument("--cache-size-mb", type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help="maximum size of cached extraction data")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always parse files, never read or write the cache")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="parse every file, without the ZIP directory checks")
+    parser.add_argument("--tfidf", choices=["corpus", "pair"], default="corpus",
+                        help="fit one TF-IDF model per file type (corpus) or one per pair")
+    parser.add_argument("--lsh-threshold", type=float, default=DEFAULT_LSH_THRESHOLD,
+                        help="approximate shingle Jaccard needed to become a candidate "
+                             "(file-list input only; lower = better recall, higher = faster)")
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM,
+                        help="MinHash permutations per document")
+    parser.add_argument("--lsh-bands", type=int, default=None,
+                        help="number of LSH bands (overrides --lsh-threshold)")
+    parser.add_argument("--shingle-size", type=int, default=DEFAULT_SHINGLE_SIZE,
+                        help="words per shingle for MinHash")
+    parser.add_argument("--max-chars", type=int, default=None,
+                        help="stop extracting Word/PowerPoint text after this many characters")
+    parser.add_argument("--text-features", choices=["text", "hashed"], default="text",
+                        help="keep Word/PowerPoint documents as text or as hashed term counts")
+    parser.add_argument("--text-lines", type=int, default=DEFAULT_TEXT_LINES,
+                        help="lines of .txt/.csv/.pdf files compared (groups of type text)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel loader processes (default: CPU count - 1)")
+    parser.add_argument("--max-inflight-mb", type=float, default=DEFAULT_MAX_INFLIGHT_MB,
+                        help="on-disk size of files being parsed at the same time")
+    parser.add_argument("--max-tasks-per-child", type=int, default=DEFAULT_MAX_TASKS_PER_CHILD,
+                        help="recycle a loader process after this many batches (0 = never)")
+    parser.add_argument("--no-shared-memory", action="store_true",
+                        help="pickle all worker results instead of using shared memory")
+    parser.add_argument("--file-timeout", type=float, default=DEFAULT_FILE_TIMEOUT,
+                        help="seconds a loader may spend on one file before it is killed and the "
+                             "file quarantined (default: no limit)")
+    parser.add_argument("--file-memory-mb", type=float, default=DEFAULT_FILE_MEMORY_MB,
+                        help="resident memory a loader may reach before it is killed and its "
+                             "file quarantined (default: no limit)")
+    parser.add_argument("--quarantine", default=DEFAULT_QUARANTINE_PATH,
+                        help="JSON list of files that hung or exhausted a loader; they are skipped")
+    parser.add_argument("--no-quarantine", action="store_true",
+                        help="neither skip nor record quarantined files")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="score pairs tile by tile, holding at most this much loaded content")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE,
+                        help="files per tile side with --memory-budget-mb")
+    parser.add_argument("--stream", action="store_true",
+                        help="read one comparison per line and write one result per line (NDJSON)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_STREAM_CHUNK,
+                        help="comparisons loaded and scored together in --stream mode")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run as a long-lived daemon with a warm worker pool")
+    parser.add_argument("--daemon-memory-mb", type=float, default=DEFAULT_DAEMON_MEMORY_MB,
+                        help="in-memory extraction cache kept by the daemon between requests")
+    parser.add_argument("--stop-daemon", action="store_true",
+                        help="ask a running daemon to shut down")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="never forward to a running daemon, always work in this process")
+    parser.add_argument("--stats", action="store_true",
+                        help="add stage timings, load times, pair/cache counters and peak RSS to the output")
+    parser.add_argument("--stats-top", type=int, default=DEFAULT_STATS_TOP,
+                        help="slowest files listed by --stats")
+    parser.add_argument("--profile", metavar="DIR", default=None,
+                        help="write cProfile stats (.pstats) of the main process and every loader to DIR")
+    return parser
+
+def write_summaries(stream, cache=None, prefilter=None, quarantine=None):
+    """Cache, prefilter and quarantine counters for one request (stderr)"""
+    if cache is not None:
+        stream.write(cache.summary() + "\n")
+    if prefilter is not None:
+        stream.write(prefilter.summary() + "\n")
+    if quarantine is not None and (quarantine.skipped or quarantine.added):
+        stream.write(quarantine.summary() + "\n")
+
+def write_quarantined(stream, quarantine):
+    """NDJSON modes: one {"quarantined": path, "reason": ...} line per file the quarantine kept out"""
+    if quarantine is not None:
+        for record in quarantine.records():
+            stream.write(json.dumps(record) + "\n")
+
+def write_stats(stream, stats, cache=None, prefilter=None):
+    """NDJSON modes: the stats object as one last {"stats": ...} line of the output"""
+    if stats is not None:
+        stream.write(json.dumps({'stats': stats.report(cache, prefilter)}) + "\n")
+        stream.flush()
+
+def run_request(args, input_stream, output_stream, error_stream, cache=None, pool=None):
+    """
+    Run one batch request - shared by the command line and the daemon
+    Returns the process exit code
+    """
+    if not args.profile:
+        return handle_request(args, input_stream, output_stream, error_stream, cache, pool)
+    
+    import cProfile
+    prefix = profile_prefix(args.profile)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return handle_request(args, input_stream, output_stream, error_stream, cache, pool, prefix)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{prefix}-main.pstats")
+        error_stream.write(f"Profiles written to {prefix}-*.pstats\n")
+
+def handle_request(args, input_stream, output_stream, error_stream, cache=None, pool=None,
+                   profile_prefix=None):
+    """Read the request, dispatch it to the matching input mode and write the results"""
+    prefilter = None if args.no_prefilter else Prefilter()
+    stats = Stats(max(0, args.stats_top)) if args.stats else None
+    options = load_options(args, profile_prefix)
+    
+    if args.stream:
+        try:
+            stream_compare(input_stream, output_stream, cache, tfidf_mode=args.tfidf,
+                           chunk_size=max(1, args.chunk_size), pool=pool,
+                           progress_stream=error_stream, options=options,
+                           prefilter=prefilter, stats=stats)
+            write_quarantined(output_stream, options.quarantine)
+            write_stats(output_stream, stats, cache, prefilter)
+            write_summaries(error_stream, cache, prefilter, options.quarantine)
+            return 0
+        except Exception as e:
+            error_stream.write(json.dumps({'error': str(e)}) + "\n")
+            return 1
     
     # Read JSON from stdin
-    input_data = sys.stdin.read()
+    input_data = input_stream.read()
     
     try:
-        comparisons = json.loads(input_data)
-        results = compare_files_batch(comparisons)
+        request = json.loads(input_data)
+        
+        if isinstance(request, dict) and 'groups' in request:
+            # Group input: every file once, results streamed as ID pairs
+            compare_groups(request['groups'], output_stream, cache, tfidf_mode=args.tfidf, pool=pool,
+                           progress_stream=error_stream, options=options,
+                           prefilter=prefilter, stats=stats)
+            write_quarantined(output_stream, options.quarantine)
+            write_stats(output_stream, stats, cache, prefilter)
+            write_summaries(error_stream, cache, prefilter, options.quarantine)
+            return 0
+        
+        if isinstance(request, dict) and 'files' in request:
+            # File-list input: {"files": [{"path": ..., "type": ...}, ...]}
+            results = {'pairs': find_similar_files(
+                request['files'], cache, tfidf_mode=args.tfidf,
+                lsh_threshold=args.lsh_threshold, num_perm=args.num_perm,
+                bands=args.lsh_bands, shingle_size=args.shingle_size, pool=pool,
+                options=options, prefilter=prefilter, stats=stats)}
+        elif args.memory_budget_mb is not None:
+            # Pair input, scored tile by tile within a memory budget
+            results = compare_files_bounded(
+                request, int(args.memory_budget_mb * 1024 * 1024), cache, tfidf_mode=args.tfidf,
+                pool=pool, options=options, tile_size=max(1, args.tile_size),
+                report_stream=error_stream, prefilter=prefilter, stats=stats)
+        else:
+            # Pair input: [{"type": ..., "file1": ..., "file2": ...}, ...]
+            results = compare_files_batch(request, cache, tfidf_mode=args.tfidf, pool=pool,
+                                          options=options, prefilter=prefilter, stats=stats)
+        
+        if options.quarantine is not None and options.quarantine.files:
+            results['quarantined'] = options.quarantine.records()
+        if stats is not None:
+            results['stats'] = stats.report(cache, prefilter)
         
         # Output results as JSON
-        print(json.dumps(results))
-        sys.exit(0)
+        output_stream.write(json.dumps(results) + "\n")
+        write_summaries(error_stream, cache, prefilter, options.quarantine)
     except Exception as e:
-        print(json.dumps({'error': str(e)}), file=sys.stderr)
+        error_stream.write(json.dumps({'error': str(e)}) + "\n")
+    return 0
+
+def main():
+    args = build_parser().parse_args()
+    
+    if args.daemon:
+        return serve_daemon(args)
+    
+    if args.stop_daemon:
+        if run_client('shutdown') is None:
+            print("No office comparer daemon is running", file=sys.stderr)
+        return 0
+    
+    # Reuse a running daemon (warm pool and caches) if there is one
+    if not args.no_daemon:
+        exit_code = run_client(sys.argv[1:])
+        if exit_code is not None:
+            return exit_code
+    
+    cache = open_cache(args)
+    try:
+        return run_request(args, sys.stdin, sys.stdout, sys.stderr, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())